@@ -5,6 +5,7 @@ from . import io
 from . import parameters
 from . import measurements
 from . import classes
+from . import parallel
 from .classes import Measurement, Parameter, ParameterConstraints, Observable, NamedInstanceClass
 from .config import config
 from flavio.physics.eft import WilsonCoefficients
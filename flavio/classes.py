@@ -2,8 +2,10 @@
 
 
 import numpy as np
+import scipy.stats
 from .config import config
-from collections import OrderedDict, defaultdict
+from collections import OrderedDict, defaultdict, namedtuple
+from collections.abc import MutableMapping
 import copy
 import flavio
 from flavio._parse_errors import constraints_from_string, \
@@ -15,6 +17,9 @@ import inspect
 import urllib.parse
 
 
+_CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
 class NamedInstanceMetaclass(type):
     # this is just needed to implement the getitem method on NamedInstanceClass
     # to allow the syntax MyClass['instancename'] as shorthand for
@@ -90,6 +95,141 @@ class Parameter(NamedInstanceClass):
         self.tex = ''
 
 
+class LogProbabilityPlan(object):
+    """Log-probability of a set of constraints compiled for a flat vector of
+    parameter values.
+
+    Instances are returned by `Constraints.get_logprobability_plan`. For every
+    constraint, the positions of its parameters in the vector and the
+    positions to exclude from a multivariate constraint are determined once,
+    such that evaluating the plan only requires indexing a numpy array.
+
+    The plans can also be evaluated on an array of shape (M, n) for an
+    ensemble of M points, in which case the log-probabilities are arrays of
+    shape (M,).
+
+    Methods:
+
+    - logprobability_all(x): dictionary with the logarithm of the probability
+      for each constraint, like `Constraints.get_logprobability_all`
+    - logprobability(x): sum of the logarithms of all probabilities
+    """
+
+    def __init__(self, parameters, steps):
+        self.parameters = parameters
+        # list of tuples (constraint, index, exclude) where `index` is the
+        # position of the parameter in the vector if a single parameter is
+        # constrained and an integer array of positions otherwise, and
+        # `exclude` is None if no parameter of the constraint is excluded
+        self.steps = steps
+
+    def logprobability_all(self, x):
+        """Return a dictionary with the logarithm of the probability for each
+        constraint given the array `x` where `x[..., i]` is the value of the
+        i-th parameter."""
+        x = np.asarray(x)
+        prob_dict = {}
+        for constraint, index, exclude in self.steps:
+            if exclude is None:
+                prob_dict[constraint] = constraint.logpdf(x[..., index])
+            else:
+                prob_dict[constraint] = constraint.logpdf(x[..., index], exclude=exclude)
+        return prob_dict
+
+    def logprobability(self, x):
+        """Return the sum of the logarithms of the probabilities of all
+        constraints given the array `x`."""
+        return sum(self.logprobability_all(x).values())
+
+
+class ParameterVector(MutableMapping):
+    """Dictionary-like container of parameter values backed by a numpy array.
+
+    The mapping from parameter names to positions in the array is fixed and
+    shared by all copies, so copying a `ParameterVector` only copies the
+    array of values. It can be used wherever a parameter dictionary is
+    expected. Values of parameters not contained in the index are stored in
+    an ordinary dictionary.
+
+    Instances are typically obtained from
+    `Constraints.get_central_vector`.
+
+    Parameters:
+
+    - `index`: dictionary of the form `{parameter: position}` with positions
+      `0, ..., n-1`
+    - `values` (optional): array of length `n` with the values (default:
+      zeros)
+    """
+
+    def __init__(self, index, values=None):
+        self.index = index
+        if values is None:
+            self.values = np.zeros(len(index))
+        else:
+            self.values = np.asarray(values, dtype=float)
+        self._extra = {}
+
+    @classmethod
+    def from_dict(cls, par_dict):
+        """Return an instance with the parameters and values of the
+        dictionary `par_dict`."""
+        index = {p: i for i, p in enumerate(par_dict)}
+        return cls(index, [par_dict[p] for p in index])
+
+    def __getitem__(self, key):
+        try:
+            return self.values[self.index[key]]
+        except KeyError:
+            return self._extra[key]
+
+    def __setitem__(self, key, value):
+        try:
+            self.values[self.index[key]] = value
+        except KeyError:
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in self.index:
+            raise TypeError("Parameter {} cannot be removed from a "
+                            "ParameterVector".format(key))
+        del self._extra[key]
+
+    def __contains__(self, key):
+        return key in self.index or key in self._extra
+
+    def __iter__(self):
+        yield from self.index
+        yield from self._extra
+
+    def __len__(self):
+        return len(self.index) + len(self._extra)
+
+    def __repr__(self):
+        return 'ParameterVector({})'.format(dict(self))
+
+    def copy(self):
+        """Return a copy sharing the index, but not the values."""
+        cp = type(self)(self.index, self.values.copy())
+        cp._extra = self._extra.copy()
+        return cp
+
+    def update(self, other=(), **kwargs):
+        if isinstance(other, ParameterVector) and other.index is self.index:
+            self.values[:] = other.values
+            self._extra.update(other._extra)
+        else:
+            super().update(other)
+        if kwargs:
+            super().update(kwargs)
+
+    def positions(self, parameters):
+        """Return an integer array with the positions of `parameters` in the
+        array of values, such that e.g. `pv.values[pv.positions(parameters)]
+        = x` sets their values."""
+        return np.array([self.index[p] for p in parameters], dtype=int)
+
+
 class Constraints(object):
     """Constraints are collections of probability distributions associated
     to objects like parameters or measurements. This is the base class of
@@ -116,6 +256,12 @@ class Constraints(object):
             # have a single constraint (changed in v0.16!).
         self._constraints = []
         self._parameters = OrderedDict()
+        # compiled log-probabilities, see get_logprobability_plan
+        self._logprobability_plans = {}
+        # index of the parameters, see get_central_vector
+        self._vector_index = None
+        # incremented whenever a constraint is added or removed
+        self._changes = 0
 
     @property
     def all_parameters(self):
@@ -135,6 +281,9 @@ class Constraints(object):
         # populate the dictionaries defined in __init__
             self._parameters[parameter] = (num, constraint)
         self._constraints.append((constraint, parameters))
+        self._logprobability_plans.clear()
+        self._vector_index = None
+        self._changes += 1
 
     def set_constraint(self, parameter, constraint_string=None,
                                         constraint_dict=None):
@@ -175,6 +324,9 @@ class Constraints(object):
     def remove_constraint(self, parameter):
         """Remove existing constraint on a parameter."""
         self._parameters.pop(parameter, None)
+        self._logprobability_plans.clear()
+        self._vector_index = None
+        self._changes += 1
 
     def remove_constraints(self, parameter):
         warnings.warn("This function was renamed to `remove_constraint` "
@@ -204,15 +356,58 @@ class Constraints(object):
         """Get central values of all constrained parameters."""
         return {parameter: self.get_central(parameter) for parameter in self._parameters.keys()}
 
-    def get_random_all(self, size=None):
+    def get_central_vector(self):
+        """Get central values of all constrained parameters as a
+        `ParameterVector`.
+
+        All vectors returned by this method share the same index until the
+        constraints are modified."""
+        if self._vector_index is None:
+            self._vector_index = {p: i for i, p in enumerate(self._parameters)}
+        central = self.get_central_all()
+        return ParameterVector(self._vector_index,
+                               [central[p] for p in self._vector_index])
+
+    def get_random_all(self, size=None, sampling='random', random_state=None):
         """Get random values for all constrained parameters where they are
         distributed according to the probability distribution applied.
 
         If `size` is not None, the dictionary values will be arrays with length
-        `size` rather than numbers."""
+        `size` rather than numbers.
+
+        `sampling` (optional) determines how the values are generated:
+
+        - 'random' (default): independent pseudo-random values
+        - 'sobol' or 'halton': scrambled low-discrepancy (quasi-Monte Carlo)
+          sequences. For 'sobol', `size` should be a power of 2.
+        - 'lhs': Latin hypercube sampling
+        - an engine returned by `get_qmc_engine`, which allows to continue
+          a low-discrepancy sequence over several calls
+
+        Except for 'random', `size` must not be None. The uniform samples are
+        transformed with the inverse CDF for univariate and with the Cholesky
+        decomposition of the covariance for multivariate normal distributions.
+        Other multivariate distributions are sampled pseudo-randomly.
+
+        `random_state` (optional) can be an integer seed, a
+        `numpy.random.SeedSequence`, or a `numpy.random.Generator` (see
+        `flavio.statistics.functions.get_random_generator`). By default, the
+        global numpy random state is used.
+        """
+        if random_state is not None:
+            # a single stream for all constraints, such that they are
+            # independent even if an integer seed is given
+            random_state = flavio.statistics.functions.get_random_generator(random_state)
         # first, generate random values for every single one of the constraints
-        random_constraints = {constraint: constraint.get_random(size=size)
-                              for constraint, _ in self._constraints}
+        if isinstance(sampling, str) and sampling == 'random':
+            random_constraints = {constraint: constraint.get_random(size=size,
+                                                                    random_state=random_state)
+                                  for constraint, _ in self._constraints}
+        else:
+            if size is None:
+                raise ValueError("size must be specified for sampling method {}".format(sampling))
+            random_constraints = self._get_random_constraints_qmc(size, sampling,
+                                                                  random_state)
         random_dict = {}
         # now, iterate over the parameters
         for parameter, constraints in self._parameters.items():
@@ -230,6 +425,39 @@ class Constraints(object):
                 raise ValueError("Unexpected error in get_random_all")
         return random_dict
 
+    def _random_dimension(self):
+        return sum(np.size(constraint.central_value)
+                   for constraint, _ in self._constraints)
+
+    def get_qmc_engine(self, sampling, random_state=None):
+        """Return a `scipy.stats.qmc` engine for the sampling method
+        'sobol', 'halton', or 'lhs' with the dimension needed for
+        `get_random_all`."""
+        return flavio.statistics.functions.get_qmc_engine(sampling, self._random_dimension(),
+                                                          random_state=random_state)
+
+    def _get_random_constraints_qmc(self, size, sampling, random_state=None):
+        if isinstance(sampling, str):
+            sampling = self.get_qmc_engine(sampling, random_state=random_state)
+        # avoid infinities from the inverse CDF at 0 or 1
+        u = np.clip(sampling.random(size), 1e-15, 1 - 1e-15)
+        random_constraints = {}
+        i = 0
+        for constraint, _ in self._constraints:
+            dim = np.size(constraint.central_value)
+            u_c = u[:, i:i + dim]
+            i += dim
+            if dim == 1 and hasattr(constraint, 'ppf'):
+                random_constraints[constraint] = constraint.ppf(u_c[:, 0])
+            elif isinstance(constraint, flavio.statistics.probability.MultivariateNormalDistribution):
+                L = flavio.statistics.functions.covariance_root(constraint.covariance)
+                z = scipy.stats.norm.ppf(u_c)
+                random_constraints[constraint] = constraint.central_value + z @ L.T
+            else:
+                random_constraints[constraint] = constraint.get_random(size=size,
+                                                                       random_state=random_state)
+        return random_constraints
+
     def get_1d_errors(self, N=1000):
         warnings.warn("This function was renamed to `get_1d_errors_random` "
                       "in v0.16 and will be removed in the future. ",
@@ -239,28 +467,55 @@ class Constraints(object):
     def get_1d_errors_random(self, N=1000):
         """Get the Gaussian standard deviation for every parameter/observable
         obtained by generating N random values."""
-        random_dict_list = [self.get_random_all() for i in range(N)]
-        interval_dict = {}
-        for k in random_dict_list[0].keys():
-            arr = np.array([r[k] for r in random_dict_list])
-            interval_dict[k] = np.std(arr)
-        return interval_dict
+        random_dict = self.get_random_all(size=N)
+        return {k: np.std(v) for k, v in random_dict.items()}
 
     def get_1d_errors_rightleft(self):
         r"""Get the left and right error for every parameter/observable
         defined such that it contains 68% probability on each side of the
         central value."""
-        errors_left = [constraint.error_left for constraint, _ in self._constraints]
-        errors_right = [constraint.error_right for constraint, _ in self._constraints]
+        # errors of every constraint, computed once even if it applies to
+        # several parameters
+        errors = {}
         error_dict = {}
         # now, iterate over the parameters
         for parameter, constraints in self._parameters.items():
             num, constraint = constraints
-            idx = ([constraint for constraint, _ in self._constraints]).index(constraint)
-            error_dict[parameter] = (np.ravel([errors_right[idx]])[num],
-                                     np.ravel([errors_left[idx]])[num])
+            if constraint not in errors:
+                errors[constraint] = (np.ravel([constraint.error_right]),
+                                      np.ravel([constraint.error_left]))
+            errors_right, errors_left = errors[constraint]
+            error_dict[parameter] = (errors_right[num], errors_left[num])
         return error_dict
 
+    def get_gaussian_approximation(self, parameters):
+        """Return the central values and the covariance matrix of a list of
+        parameters/observables in the Gaussian approximation of their
+        constraints.
+
+        For univariate constraints, the variance is given by the square of the
+        average of the left and right 1 sigma errors. For multivariate normal
+        distributions, the covariance is used, while for other multivariate
+        distributions it is estimated from random samples."""
+        central = np.array([self.get_central(p) for p in parameters])
+        covariance = np.zeros((len(parameters), len(parameters)))
+        # group the parameters by constraint
+        groups = OrderedDict()
+        for i, p in enumerate(parameters):
+            num, constraint = self._parameters[p]
+            groups.setdefault(id(constraint), (constraint, []))[1].append((i, num))
+        for constraint, indices in groups.values():
+            i, num = (list(x) for x in zip(*indices))
+            if hasattr(constraint, 'covariance'):
+                cov = np.atleast_2d(constraint.covariance)
+            elif np.ndim(constraint.central_value) == 0:
+                err = (constraint.error_left + constraint.error_right) / 2
+                cov = np.array([[err**2]])
+            else:
+                cov = np.atleast_2d(np.cov(constraint.get_random(size=1000).T))
+            covariance[np.ix_(i, i)] = cov[np.ix_(num, num)]
+        return central, covariance
+
     def get_logprobability_all(self, par_dict, exclude_parameters=[]):
         """Return a dictionary with the logarithm of the probability for each
         constraint/probability distribution.
@@ -300,6 +555,69 @@ class Constraints(object):
                 prob_dict[constraint] = constraint.logpdf(x, exclude=exclude)
         return prob_dict
 
+    def get_logprobability_plan(self, parameters, exclude_parameters=()):
+        """Return an instance of `LogProbabilityPlan` that evaluates the
+        logarithm of the probability for each constraint on a numpy array
+        with the values of `parameters` (in this order).
+
+        This is equivalent to `get_logprobability_all`, but the bookkeeping
+        of which parameters are constrained by which constraint is only done
+        once. Constraints on parameters that are not contained in `parameters`
+        are treated like those on `exclude_parameters`. The plan is cached
+        until the constraints are modified.
+        """
+        key = (tuple(parameters), frozenset(exclude_parameters))
+        if key in self._logprobability_plans:
+            return self._logprobability_plans[key]
+        index = {p: i for i, p in enumerate(parameters)}
+        steps = []
+        for constraint, c_parameters in self._constraints:
+            # list of constrained parameters except the excluded ones
+            p_cons = [p for p in c_parameters
+                      if (p in index and p not in key[1]
+                      and (c_parameters.index(p), constraint) == self._parameters.get(p, None))]
+            if not p_cons:
+                # nothing to constrain
+                continue
+            if len(p_cons) == len(c_parameters):
+                exclude = None
+            else:
+                exclude = tuple(i for i, p in enumerate(c_parameters)
+                                if p not in p_cons)
+            if len(p_cons) == 1:
+                # 1D constraints (or multivariate constraints with a single
+                # remaining parameter) should have a scalar, not a length-1
+                # array
+                steps.append((constraint, index[p_cons[0]], exclude))
+            else:
+                steps.append((constraint, np.array([index[p] for p in p_cons]), exclude))
+        plan = LogProbabilityPlan(key[0], steps)
+        self._logprobability_plans[key] = plan
+        return plan
+
+    def get_logprobability_all_batch(self, par_dict, exclude_parameters=[]):
+        """Return an array with the logarithm of the total probability of all
+        constraints for an ensemble of points.
+
+        Inputs
+        ------
+        - par_dict
+          A dictionary of the form {parameter: array, ...} where all arrays
+          have the same shape (M,), e.g. the output of
+          `get_random_all(size=M)`.
+        - exclude_parameters (optional)
+          An iterable of strings (default: empty) that specifies parameters
+          that should be ignored, see `get_logprobability_all`. Constraints
+          on parameters missing in `par_dict` are ignored as well.
+
+        Returns an array of shape (M,).
+        """
+        parameters = list(par_dict.keys())
+        x = np.stack([np.asarray(par_dict[p], dtype=float) for p in parameters],
+                     axis=-1)
+        plan = self.get_logprobability_plan(parameters, exclude_parameters)
+        return np.zeros(x.shape[:-1]) + plan.logprobability(x)
+
     def copy(self):
         # this is to have a .copy() method like for a dictionary
         return copy.deepcopy(self)
@@ -450,6 +768,7 @@ class Observable(NamedInstanceClass):
         self.arguments = arguments
         self.prediction = None
         self.tex = ''
+        self._prediction_cache = None
 
     def __repr__(self):
         return "Observable('{}', arguments={})".format(self.name, self.arguments)
@@ -524,13 +843,58 @@ class Observable(NamedInstanceClass):
 
     def set_prediction(self, prediction):
         self.prediction = prediction
+        if self._prediction_cache is not None:
+            self._prediction_cache.clear()
+
+    def enable_cache(self, maxsize=None):
+        """Cache the predictions of the observable for repeated calls of
+        `prediction_par`.
+
+        Only the parameters the prediction actually depends on (plus the
+        Wilson coefficients and the arguments) enter the cache key, so the
+        cache is useful e.g. when scanning parameters that only affect other
+        observables. See `PredictionCache` for details.
+
+        Parameters:
+
+        - `maxsize` (optional): maximum number of cached predictions. Defaults
+          to the `cache size` setting in `flavio.config`.
+        """
+        self._prediction_cache = PredictionCache(maxsize=maxsize)
+
+    def disable_cache(self):
+        """Stop caching the predictions of the observable."""
+        self._prediction_cache = None
+
+    def clear_cache(self):
+        """Remove all cached predictions of the observable."""
+        if self._prediction_cache is not None:
+            self._prediction_cache.clear()
+
+    def cache_info(self):
+        """Return the hits, misses, maximum size and current size of the
+        prediction cache, or None if caching is not enabled."""
+        if self._prediction_cache is None:
+            return None
+        return self._prediction_cache.info()
 
     def prediction_central(self, constraints_obj, wc_obj, *args, **kwargs):
         return self.prediction.get_central(constraints_obj, wc_obj, *args, **kwargs)
 
     def prediction_par(self, par_dict, wc_obj, *args, **kwargs):
+        if self._prediction_cache is not None:
+            return self._prediction_cache.get(self.prediction.get_par,
+                                              par_dict, wc_obj, *args, **kwargs)
         return self.prediction.get_par(par_dict, wc_obj, *args, **kwargs)
 
+    def prediction_par_batch(self, par_arrays, wc_obj, *args, **kwargs):
+        """Get the predictions for many parameter points at once.
+
+        `par_arrays` is a dictionary of parameter values where (some of) the
+        values are arrays of length N, as returned by
+        `Constraints.get_random_all(size=N)`. Returns an array of length N."""
+        return self.prediction.get_par_batch(par_arrays, wc_obj, *args, **kwargs)
+
     def add_taxonomy(self, taxonomy_string):
         """Add a metadata taxonomy for the observable.
 
@@ -549,7 +913,7 @@ class Observable(NamedInstanceClass):
         return dicts(cls.taxonomy)
 
     @classmethod
-    def from_function(cls, name, observables, function):
+    def from_function(cls, name, observables, function, vectorized=False):
         """Instantiate an observable object and the corresponding Prediction
         object for an observable that is defined as a mathematical function
         of two or more existing observables with existing predictions.
@@ -561,6 +925,9 @@ class Observable(NamedInstanceClass):
         - observables: list of string names of the observables to be combined
         - function: function of the observables. The number of arguments must
           match the number of observables
+        - vectorized: optional; set to True if `function` works on arrays of
+          predictions. The new prediction is then vectorized (see
+          `Prediction`) if the predictions of all the observables are.
 
         Example:
         --------
@@ -588,7 +955,10 @@ class Observable(NamedInstanceClass):
                  for observable in observables]
         def pfct(*args, **kwargs):
             return function(*[f(*args, **kwargs) for f in pfcts])
-        Prediction(name, pfct)
+        vectorized = vectorized and all(
+            Observable[observable].prediction.vectorized
+            for observable in observables)
+        Prediction(name, pfct, vectorized=vectorized)
         return obs_obj
 
 
@@ -617,16 +987,209 @@ class AuxiliaryQuantity(NamedInstanceClass):
         return implementation.get(par_dict, wc_obj, *args, **kwargs)
 
 
+def _batch_size(par_arrays):
+    """Return the number of parameter points in a dictionary of parameter
+    arrays, i.e. the length of its non-scalar values."""
+    for v in par_arrays.values():
+        if np.ndim(v) > 0:
+            return len(v)
+    raise ValueError("No parameter arrays found")
+
+
+def _batch_point(par_arrays, i):
+    """Return the parameter dictionary of the `i`-th point in a dictionary of
+    parameter arrays. Scalar values are shared among all points."""
+    return {k: v[i] if np.ndim(v) > 0 else v for k, v in par_arrays.items()}
+
+
+def _batch_split(par_arrays, n):
+    """Split a dictionary of parameter arrays into a list of at most `n`
+    dictionaries of (roughly equally long) sub-arrays."""
+    N = _batch_size(par_arrays)
+    indices = np.array_split(np.arange(N), min(n, N))
+    return [{k: v[idx] if np.ndim(v) > 0 else v for k, v in par_arrays.items()}
+            for idx in indices]
+
+
+class EvaluationSession(object):
+    """Cache for intermediate results shared by the predictions of several
+    observables at the same point in parameter and Wilson coefficient space.
+
+    Within the block
+
+    ```
+    with EvaluationSession(par_dict, wc_obj):
+        ...
+    ```
+
+    theory functions called with the *same* parameter dictionary and Wilson
+    coefficient instance can use `EvaluationSession.cached` to compute
+    intermediate results (e.g. RG-evolved Wilson coefficients or helicity
+    amplitudes) only once. Outside of a session, or for a different
+    dictionary or instance, results are simply recomputed. The parameter
+    dictionary must not be modified while the session is active.
+    """
+
+    # stack of active sessions
+    _active = []
+
+    def __init__(self, par_dict, wc_obj):
+        self.par_dict = par_dict
+        self.wc_obj = wc_obj
+        self.fwc_obj = flavio.WilsonCoefficients.from_wilson(wc_obj)
+        self._cache = {}
+
+    def __enter__(self):
+        EvaluationSession._active.append(self)
+        return self
+
+    def __exit__(self, *args):
+        EvaluationSession._active.remove(self)
+
+    def matches(self, par_dict, wc_obj):
+        """Return True if the session applies to `par_dict` and `wc_obj`."""
+        return (par_dict is self.par_dict
+                and (wc_obj is self.wc_obj or wc_obj is self.fwc_obj))
+
+    @classmethod
+    def get_active(cls, par_dict, wc_obj):
+        """Return the innermost active session for the parameter dictionary
+        and Wilson coefficient instance, or None if there is none."""
+        for session in reversed(cls._active):
+            if session.matches(par_dict, wc_obj):
+                return session
+        return None
+
+    @classmethod
+    def cached(cls, par_dict, wc_obj, key, function):
+        """Return `function()`, computed only once per active session for
+        `par_dict` and `wc_obj`. `key` must be a hashable object identifying
+        the result uniquely for fixed parameters and Wilson coefficients."""
+        session = cls.get_active(par_dict, wc_obj)
+        if session is None:
+            return function()
+        if key not in session._cache:
+            session._cache[key] = function()
+        return session._cache[key]
+
+
+class PredictionCache(object):
+    """Least-recently-used cache of the predictions of an observable.
+
+    The cache key contains the arguments of the observable, the Wilson
+    coefficients, and only the values of the parameters the prediction
+    actually depends on. These are determined on every cache miss by
+    evaluating the prediction with a `flavio.functions.AwareDict` that
+    records the parameters accessed. Changing a parameter the observable
+    does not depend on therefore does not lead to a recomputation.
+
+    Parameters:
+
+    - `maxsize` (optional): maximum number of cached predictions. Defaults to
+      the `cache size` setting in `flavio.config`.
+
+    Note that changes of `flavio.config` are not tracked; call `clear` after
+    modifying it.
+    """
+
+    def __init__(self, maxsize=None):
+        if maxsize is None:
+            maxsize = config['settings']['cache size']
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        # dependent parameters for given arguments and Wilson coefficients
+        self._dependencies = {}
+        self._values = OrderedDict()
+
+    def __len__(self):
+        return len(self._values)
+
+    def clear(self):
+        """Remove all cached predictions and reset the statistics."""
+        self._dependencies.clear()
+        self._values.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        """Return the cache statistics as a named tuple, analogous to
+        `functools.lru_cache`."""
+        return _CacheInfo(self.hits, self.misses, self.maxsize, len(self))
+
+    @staticmethod
+    def _wc_key(wc_obj):
+        if wc_obj is None or wc_obj.wc is None:
+            return None
+        wc = wc_obj.wc
+        return (wc.eft, wc.basis, wc.scale, tuple(sorted(wc.dict.items())),
+                repr(getattr(wc_obj, '_options', None)))
+
+    @staticmethod
+    def _key(call_key, dependencies, par_dict):
+        return (call_key, dependencies,
+                tuple(par_dict[p] for p in dependencies))
+
+    @staticmethod
+    def _record(par_dict, dependencies):
+        # if the dictionary is itself tracking accessed parameters, pass on
+        # the dependencies that are hidden by the cache
+        if isinstance(par_dict, flavio.functions.AwareDict):
+            par_dict.akeys.update(dependencies)
+
+    def get(self, function, par_dict, wc_obj, *args, **kwargs):
+        """Return `function(par_dict, wc_obj, *args, **kwargs)`, retrieving
+        it from the cache if possible."""
+        try:
+            call_key = (args, tuple(sorted(kwargs.items())),
+                        self._wc_key(wc_obj))
+            dependencies = self._dependencies.get(call_key)
+            if dependencies is not None:
+                key = self._key(call_key, dependencies, par_dict)
+                if key in self._values:
+                    self.hits += 1
+                    self._values.move_to_end(key)
+                    self._record(par_dict, dependencies)
+                    return self._values[key]
+        except (TypeError, KeyError):
+            # unhashable arguments or parameter values: do not cache
+            return function(par_dict, wc_obj, *args, **kwargs)
+        self.misses += 1
+        # the prediction is a deterministic function of the parameters it
+        # reads, so the union of parameters read so far is a valid key
+        apar = flavio.functions.AwareDict(par_dict)
+        value = function(apar, wc_obj, *args, **kwargs)
+        dependencies = set(dependencies or ())
+        dependencies.update(p for p in apar.akeys if p in par_dict)
+        dependencies = tuple(sorted(dependencies))
+        self._dependencies[call_key] = dependencies
+        self._record(par_dict, dependencies)
+        try:
+            key = self._key(call_key, dependencies, par_dict)
+            self._values[key] = value
+        except TypeError:
+            return value
+        if self.maxsize is not None and len(self._values) > self.maxsize:
+            self._values.popitem(last=False)
+        return value
+
+
 class Prediction(object):
-    """A prediction is the theoretical prediction for an observable."""
+    """A prediction is the theoretical prediction for an observable.
 
-    def __init__(self, observable, function):
+    If `vectorized` is True, the prediction function accepts a dictionary of
+    parameter arrays (all of the same length) and returns an array of
+    predictions. This allows `get_par_batch` to evaluate many parameter points
+    in a single call."""
+
+    def __init__(self, observable, function, vectorized=False):
         try:
             Observable[observable]
         except KeyError:
             raise ValueError("The observable " + observable + " does not exist")
         self.observable = observable
         self.function = function
+        self.vectorized = vectorized
         self.observable_obj = Observable[observable]
         self.observable_obj.set_prediction(self)
 
@@ -636,9 +1199,31 @@ class Prediction(object):
         return self.function(fwc_obj, par_dict, *args, **kwargs)
 
     def get_par(self, par_dict, wc_obj, *args, **kwargs):
-        fwc_obj = flavio.WilsonCoefficients.from_wilson(wc_obj)
+        session = EvaluationSession.get_active(par_dict, wc_obj)
+        if session is not None:
+            # use the converted instance of the session for caching to work
+            fwc_obj = session.fwc_obj
+        else:
+            fwc_obj = flavio.WilsonCoefficients.from_wilson(wc_obj)
         return self.function(fwc_obj, par_dict, *args, **kwargs)
 
+    def get_par_batch(self, par_arrays, wc_obj, *args, **kwargs):
+        """Get the predictions for many parameter points at once.
+
+        `par_arrays` is a dictionary of parameter values where (some of) the
+        values are arrays of length N. Returns an array of length N. If the
+        prediction function is not vectorized, it is called for each of the
+        N points in turn."""
+        fwc_obj = flavio.WilsonCoefficients.from_wilson(wc_obj)
+        N = _batch_size(par_arrays)
+        if self.vectorized:
+            pred = np.asarray(self.function(fwc_obj, par_arrays, *args, **kwargs))
+            # a prediction not depending on parameters might return a scalar
+            return np.broadcast_to(pred, (N,)).copy()
+        return np.array([self.function(fwc_obj, _batch_point(par_arrays, i),
+                                       *args, **kwargs)
+                         for i in range(N)])
+
 
 class Implementation(NamedInstanceClass):
     """An implementation is the theoretical prediction for an auxiliary
@@ -698,12 +1283,36 @@ class Measurement(Constraints, NamedInstanceClass):
        the arguments, of an observable with `n` arguments.
     """
 
+    # incremented whenever a measurement is created, deleted, or modified, so
+    # that e.g. fits can cache which measurements are relevant to them
+    _revision = 0
+
     def __init__(self, name):
         NamedInstanceClass.__init__(self, name)
         Constraints.__init__(self)
         self.inspire = ''
         self.experiment = ''
         self.url = ''
+        Measurement._revision += 1
+
+    @classmethod
+    def del_instance(cls, name):
+        super().del_instance(name)
+        Measurement._revision += 1
+
+    @classmethod
+    def clear_all(cls):
+        """Delete all instances."""
+        super().clear_all()
+        Measurement._revision += 1
+
+    def add_constraint(self, parameters, constraint):
+        super().add_constraint(parameters, constraint)
+        Measurement._revision += 1
+
+    def remove_constraint(self, parameter):
+        super().remove_constraint(parameter)
+        Measurement._revision += 1
 
     def __repr__(self):
         return "Measurement('{}')".format(self.name)
@@ -4,7 +4,8 @@ top-level namespace."""
 import flavio
 import numpy as np
 from collections import defaultdict
-from multiprocessing import Pool
+from functools import partial
+from numbers import Integral
 
 def np_prediction(obs_name, wc_obj, *args, **kwargs):
     """Get the central value of the new physics prediction of an observable.
@@ -31,18 +32,151 @@ def sm_prediction(obs_name, *args, **kwargs):
 
     Additional arguments are passed to the observable and are necessary,
     depending on the observable (e.g. $q^2$-dependent observables).
+
+    If the `cache directory` setting in `flavio.config` is not null, the
+    result is stored on disk and reused (see `flavio.io.cache`).
     """
     obs = flavio.classes.Observable[obs_name]
     wc_sm = flavio.physics.eft._wc_sm
-    return obs.prediction_central(flavio.default_parameters, wc_sm, *args, **kwargs)
-
-def _obs_prediction_par(par, obs_name, wc_obj, *args, **kwargs):
-    obs = flavio.classes.Observable.get_instance(obs_name)
-    return obs.prediction_par(par, wc_obj, *args, **kwargs)
-
-from functools import partial
-
-def np_uncertainty(obs_name, wc_obj, *args, N=100, threads=1, **kwargs):
+    def compute(dependencies):
+        par_central = flavio.default_parameters.get_central_all()
+        if not dependencies:
+            return obs.prediction_par(par_central, wc_sm, *args, **kwargs), None
+        # the dependencies are known after evaluating at the central values
+        apar_central = AwareDict(par_central)
+        pred = obs.prediction_par(apar_central, wc_sm, *args, **kwargs)
+        return pred, _existing_parameters(apar_central.akeys)
+    return flavio.io.cache.cached('sm_prediction', obs_name, args, kwargs,
+                                  compute, central_only=True)
+
+def _obs_list_prediction_par_batch(par_arrays, obs_list, wc_obj, kwargs):
+    """Return an array of shape (len(obs_list), N) with the predictions of
+    all observables for N parameter points.
+
+    Observables with non-vectorized predictions are all evaluated at one
+    parameter point before moving on to the next, so that intermediate
+    results shared between observables can be reused."""
+    N = flavio.classes._batch_size(par_arrays)
+    obs_args = [(flavio.classes.Observable[obs], ()) if isinstance(obs, str)
+                else (flavio.classes.Observable[obs[0]], obs[1:])
+                for obs in obs_list]
+    all_pred = np.empty((len(obs_list), N))
+    loop = []
+    for j, (obs_obj, args) in enumerate(obs_args):
+        if obs_obj.prediction.vectorized:
+            all_pred[j] = obs_obj.prediction_par_batch(par_arrays, wc_obj,
+                                                       *args, **kwargs)
+        else:
+            loop.append(j)
+    if loop:
+        for i in range(N):
+            par = flavio.classes._batch_point(par_arrays, i)
+            with flavio.classes.EvaluationSession(par, wc_obj):
+                for j in loop:
+                    obs_obj, args = obs_args[j]
+                    all_pred[j, i] = obs_obj.prediction_par(par, wc_obj,
+                                                            *args, **kwargs)
+    return all_pred
+
+def _map_batch(function, par_arrays, threads, executor):
+    """Evaluate `function` on a dictionary of parameter arrays, splitting the
+    arrays into chunks that are evaluated in parallel if `threads` is bigger
+    than one or an executor is given. `function` must return arrays whose
+    last axis corresponds to the parameter points."""
+    if executor is None:
+        if threads == 1:
+            return function(par_arrays)
+        executor = flavio.parallel.get_executor(threads)
+    chunks = flavio.classes._batch_split(par_arrays, executor.threads)
+    return np.concatenate(executor.map(function, chunks), axis=-1)
+
+def _propagate_covariance(obs_list, wc_obj, par_vary, order, threads,
+                          executor, kwargs):
+    """Return the covariance matrix of the predictions for a list of
+    observables obtained by propagating the parameter uncertainties with
+    finite differences (see `flavio.statistics.functions`)."""
+    parameters = set()
+    for obs in obs_list:
+        if isinstance(obs, str):
+            parameters |= _get_dependent_parameters(obs, wc_obj, **kwargs)
+        else:
+            parameters |= _get_dependent_parameters(obs[0], wc_obj, *obs[1:],
+                                                    **kwargs)
+    if par_vary != 'all':
+        parameters &= set(par_vary)
+    parameters = sorted(parameters)
+    if not parameters:
+        return np.zeros((len(obs_list), len(obs_list)))
+    central, covariance = flavio.default_parameters.get_gaussian_approximation(parameters)
+    points = flavio.statistics.functions.finite_difference_points(central, covariance)
+    par_arrays = flavio.default_parameters.get_central_all()
+    for i, p in enumerate(parameters):
+        par_arrays[p] = points[:, i]
+    all_pred = _map_batch(partial(_obs_list_prediction_par_batch,
+                                  obs_list=obs_list, wc_obj=wc_obj,
+                                  kwargs=kwargs),
+                          par_arrays, threads, executor)
+    return flavio.statistics.functions.finite_difference_covariance(all_pred.T, order=order)
+
+# order of the finite difference propagation for the different methods
+_propagation_order = {'linear': 1, 'quadratic': 2}
+
+def _check_method(method):
+    if method != 'MC' and method not in _propagation_order:
+        raise ValueError("Unknown method: {}".format(method))
+
+def _mc_covariance(obs_list, wc_obj, N, par_vary, threads, executor,
+                   chunk_size, sampling, target_rel_precision, kwargs,
+                   random_state=None):
+    """Return a `RunningCovariance` instance with the Monte Carlo estimate
+    of the covariance of the predictions for a list of observables.
+
+    The parameters are generated and the predictions evaluated in chunks of
+    `chunk_size`. If `target_rel_precision` is not None, no further chunks
+    are evaluated once the relative statistical uncertainty of all standard
+    deviations is below it.
+
+    All random numbers are drawn in the main process, so the result for a
+    given `random_state` does not depend on the number of threads."""
+    par_central_all = flavio.default_parameters.get_central_all()
+    def par_random_some(par_random, par_central):
+        # take the central values for the parameters not to be varied
+        par1 = {k: v for k, v in par_central.items() if k not in par_vary}
+        # take the random values for the parameters to be varied
+        par2 = {k: v for k, v in par_random.items() if k in par_vary}
+        par1.update(par2) # merge them
+        return par1
+    get_predictions = partial(_obs_list_prediction_par_batch,
+                              obs_list=obs_list, wc_obj=wc_obj, kwargs=kwargs)
+    covariance = flavio.statistics.functions.RunningCovariance(len(obs_list))
+    if random_state is not None:
+        # continue the same stream from chunk to chunk
+        random_state = flavio.statistics.functions.get_random_generator(random_state)
+    if sampling != 'random':
+        sampling = flavio.default_parameters.get_qmc_engine(sampling,
+                                                            random_state=random_state)
+    for n in np.diff(np.append(np.arange(0, N, chunk_size), N)):
+        par_random_all = flavio.default_parameters.get_random_all(size=n,
+                                                                  sampling=sampling,
+                                                                  random_state=random_state)
+        if par_vary == 'all':
+            par_random = par_random_all
+        else:
+            par_random = par_random_some(par_random_all, par_central_all)
+        all_pred = _map_batch(get_predictions, par_random, threads, executor)
+        covariance.update(all_pred.T)
+        if (target_rel_precision is not None
+                and covariance.N >= _min_samples_adaptive
+                and np.all(covariance.std_relative_error <= target_rel_precision)):
+            break
+    return covariance
+
+# minimum number of samples before checking the convergence of the MC
+_min_samples_adaptive = 20
+
+def np_uncertainty(obs_name, wc_obj, *args, N=100, threads=1, executor=None,
+                   method='MC', sampling='random', target_rel_precision=None,
+                   chunk_size=100, random_state=None, **kwargs):
     """Get the uncertainty of the prediction of an observable in the presence
     of new physics.
 
@@ -55,33 +189,50 @@ def np_uncertainty(obs_name, wc_obj, *args, N=100, threads=1, **kwargs):
     The relative accuracy of the uncertainty returned is given by $1/\sqrt{2N}$.
     - `threads` (optional): if bigger than one, number of threads for parallel
     computation of the uncertainty.
+    - `executor` (optional): an instance of `flavio.parallel.Executor` to use
+    for the parallel computation. If not given and `threads` is bigger than
+    one, a shared executor with `threads` worker processes is used.
+    - `method` (optional): 'MC' (default) for Monte Carlo error propagation
+    with `N` random evaluations; 'linear' for linear error propagation with
+    finite differences, requiring $2n+1$ evaluations for $n$ parameters the
+    observable depends on and treating all their uncertainties as Gaussian;
+    'quadratic' to add the second-order terms to the linear approximation.
+    - `sampling` (optional): for the 'MC' method, how the parameter values are
+    generated: 'random' (default), 'sobol' or 'halton' for quasi-Monte Carlo
+    sequences, or 'lhs' for Latin hypercube sampling. The latter options
+    typically give the same precision with fewer evaluations (see
+    `Constraints.get_random_all`).
+    - `target_rel_precision` (optional): if given, the observable is evaluated
+    in chunks of `chunk_size` (default: 100) random points until the relative
+    statistical uncertainty of the result, estimated from the sample
+    kurtosis, is below this number (e.g. 0.05), or `N` evaluations are
+    reached.
+    - `random_state` (optional): integer seed, `numpy.random.SeedSequence`,
+    or `numpy.random.Generator` used to generate the parameter values (see
+    `flavio.statistics.functions.get_random_generator`). With a seed, the
+    result is reproducible and independent of `threads`. By default, the
+    global numpy random state is used.
 
     Additional arguments are passed to the observable and are necessary,
     depending on the observable (e.g. $q^2$-dependent observables).
     """
-    par_random = flavio.default_parameters.get_random_all(size=N)
-    par_random = [{k: v[i] for k, v in par_random.items()} for i in range(N)]
-    if threads == 1:
-        # not parallel
-        all_pred = np.array([_obs_prediction_par(par, obs_name, wc_obj, *args, **kwargs) for par in par_random])
-    else:
-        # parallel
-        pool = Pool(threads)
-        # convert args to kwargs
-        _kwargs = kwargs.copy()
-        obs_args = flavio.Observable[obs_name].arguments
-        for i, a in enumerate(args):
-            _kwargs[obs_args[i]] = a
-        all_pred = np.array(
-                    pool.map(
-                        partial(_obs_prediction_par,
-                        obs_name=obs_name, wc_obj=wc_obj, **_kwargs),
-                        par_random))
-        pool.close()
-        pool.join()
-    return np.std(all_pred)
-
-def sm_uncertainty(obs_name, *args, N=100, threads=1, **kwargs):
+    _check_method(method)
+    if method != 'MC':
+        cov = _propagate_covariance([(obs_name,) + args], wc_obj, 'all',
+                                    _propagation_order[method],
+                                    threads, executor, kwargs)
+        return np.sqrt(cov[0, 0])
+    if target_rel_precision is None:
+        chunk_size = N
+    covariance = _mc_covariance([(obs_name,) + args], wc_obj, N, 'all',
+                                threads, executor, chunk_size, sampling,
+                                target_rel_precision, kwargs, random_state)
+    # standard deviation normalized by N like np.std
+    return np.sqrt(covariance.covariance[0, 0] * (covariance.N - 1) / covariance.N)
+
+def sm_uncertainty(obs_name, *args, N=100, threads=1, executor=None,
+                   method='MC', sampling='random', target_rel_precision=None,
+                   chunk_size=100, random_state=None, **kwargs):
     """Get the uncertainty of the Standard Model prediction of an observable.
 
     Parameters
@@ -92,12 +243,56 @@ def sm_uncertainty(obs_name, *args, N=100, threads=1, **kwargs):
     The relative accuracy of the uncertainty returned is given by $1/\sqrt{2N}$.
     - `threads` (optional): if bigger than one, number of threads for parallel
     computation of the uncertainty.
+    - `executor` (optional): an instance of `flavio.parallel.Executor` to use
+    for the parallel computation.
+    - `method` (optional): 'MC' (default), 'linear', or 'quadratic'. See
+    `np_uncertainty`.
+    - `sampling` (optional): 'random' (default), 'sobol', 'halton', or 'lhs'.
+    See `np_uncertainty`.
+    - `target_rel_precision`, `chunk_size` (optional): adaptive number of
+    evaluations, see `np_uncertainty`.
+    - `random_state` (optional): seed or generator for the random parameter
+    values, see `np_uncertainty`.
 
     Additional arguments are passed to the observable and are necessary,
     depending on the observable (e.g. $q^2$-dependent observables).
+
+    Like `sm_prediction`, the result is cached on disk if the
+    `cache directory` setting is not null, unless `random_state` is given
+    as a generator or seed sequence rather than an integer seed.
     """
     wc_sm = flavio.physics.eft._wc_sm
-    return np_uncertainty(obs_name, wc_sm, *args, N=N, threads=threads, **kwargs)
+    def compute(dependencies):
+        unc = np_uncertainty(obs_name, wc_sm, *args, N=N, threads=threads,
+                             executor=executor, method=method,
+                             sampling=sampling,
+                             target_rel_precision=target_rel_precision,
+                             chunk_size=chunk_size, random_state=random_state,
+                             **kwargs)
+        if not dependencies:
+            return unc, None
+        return unc, get_dependent_parameters_sm(obs_name, *args, **kwargs)
+    if method == 'MC':
+        if not _cacheable_random_state(random_state):
+            return compute(False)[0]
+        options = {'N': N, 'sampling': sampling,
+                   'target_rel_precision': target_rel_precision,
+                   'random_state': random_state}
+        if target_rel_precision is not None:
+            options['chunk_size'] = chunk_size
+    else:
+        options = {'method': method}
+    return flavio.io.cache.cached('sm_uncertainty', obs_name, args, kwargs,
+                                  compute, options=options)
+
+def _cacheable_random_state(random_state):
+    """Return True if results computed with `random_state` can be stored in
+    the disk cache.
+
+    An integer seed is part of the key of the cache, while a generator or
+    seed sequence does not identify the random numbers it produces, so the
+    cache is skipped."""
+    return random_state is None or isinstance(random_state, Integral)
 
 class AwareDict(dict):
     """Generalization of dictionary that adds the key to the previously defined
@@ -114,6 +309,18 @@ class AwareDict(dict):
         self.akeys.add(key)
         return dict.__getitem__(self, key)
 
+    def get(self, key, default=None):
+        """Get an item, adding the key to the `pcalled` set."""
+        self.akeys.add(key)
+        return dict.get(self, key, default)
+
+    def derive(self, d):
+        """Return a new instance for the dictionary `d` that adds accessed
+        keys to the same set as this one."""
+        cp = type(self)(d)
+        cp.akeys = self.akeys
+        return cp
+
     def __copy__(self):
         cp = type(self)(self.d)
         cp.akeys = self.akeys
@@ -124,18 +331,24 @@ class AwareDict(dict):
 
 def get_dependent_parameters_sm(obs_name, *args, **kwargs):
     """Get the set of parameters the SM prediction of the observable depends on."""
-    obs = flavio.classes.Observable[obs_name]
     wc_sm = flavio.physics.eft._wc_sm
+    return _get_dependent_parameters(obs_name, wc_sm, *args, **kwargs)
+
+def _get_dependent_parameters(obs_name, wc_obj, *args, **kwargs):
+    obs = flavio.classes.Observable[obs_name]
     par_central = flavio.default_parameters.get_central_all()
     apar_central = AwareDict(par_central)
-    obs.prediction_par(apar_central, wc_sm, *args, **kwargs)
+    obs.prediction_par(apar_central, wc_obj, *args, **kwargs)
+    return _existing_parameters(apar_central.akeys)
+
+def _existing_parameters(keys):
     # return all observed keys except the ones that don't actually correspond
     # to existing parameter names (this might happen by user functions modifying
     # the dictionaries)
-    return {p for p in apar_central.akeys
-            if p in flavio.Parameter.instances.keys()}
+    return {p for p in keys if p in flavio.Parameter.instances.keys()}
 
-def sm_error_budget(obs_name, *args, N=50, **kwargs):
+def sm_error_budget(obs_name, *args, N=50, sampling='random', threads=1,
+                    executor=None, method='MC', random_state=None, **kwargs):
     """Get the *relative* uncertainty of the Standard Model prediction due to
     variation of individual observables.
 
@@ -145,18 +358,51 @@ def sm_error_budget(obs_name, *args, N=50, **kwargs):
     - `obs_name`: name of the observable as a string
     - `N` (optional): number of random evaluations of the observable.
     The relative accuracy of the uncertainties returned is given by $1/\sqrt{2N}$.
+    - `sampling` (optional): 'random' (default), 'sobol', 'halton', or 'lhs'.
+    See `np_uncertainty`.
+    - `threads` (optional): if bigger than one, number of threads for parallel
+    computation of the uncertainties.
+    - `executor` (optional): an instance of `flavio.parallel.Executor` to use
+    for the parallel computation.
+    - `method` (optional): 'MC' (default), 'linear', or 'quadratic'. See
+    `np_uncertainty`. For the latter two, `N` and `sampling` are ignored.
+    - `random_state` (optional): seed or generator for the random parameter
+    values, see `np_uncertainty`.
 
     Additional arguments are passed to the observable and are necessary,
     depending on the observable (e.g. $q^2$-dependent observables).
+
+    The result is cached on disk if the `cache directory` setting is not null,
+    unless `random_state` is given as a generator or seed sequence rather than
+    an integer seed.
     """
+    _check_method(method)
+    def compute(dependencies):
+        budget = _sm_error_budget(obs_name, *args, N=N, sampling=sampling,
+                                  threads=threads, executor=executor,
+                                  method=method, random_state=random_state,
+                                  **kwargs)
+        if not dependencies:
+            return budget, None
+        return budget, get_dependent_parameters_sm(obs_name, *args, **kwargs)
+    if method == 'MC':
+        if not _cacheable_random_state(random_state):
+            return compute(False)[0]
+        options = {'N': N, 'sampling': sampling, 'random_state': random_state}
+    else:
+        options = {'method': method}
+    return flavio.io.cache.cached('sm_error_budget', obs_name, args, kwargs,
+                                  compute, options=options)
+
+def _sm_error_budget(obs_name, *args, N=50, sampling='random', threads=1,
+                     executor=None, method='MC', random_state=None, **kwargs):
     obs = flavio.classes.Observable[obs_name]
     wc_sm = flavio.physics.eft._wc_sm
     par_central = flavio.default_parameters.get_central_all()
-    par_random = [flavio.default_parameters.get_random_all() for i in range(N)]
     pred_central = obs.prediction_par(par_central, wc_sm, *args, **kwargs)
 
     # Step 1: determine the parameters the observable depends on at all.
-    dependent_par = get_dependent_parameters_sm(obs_name, *args, **kwargs)
+    dependent_par = sorted(get_dependent_parameters_sm(obs_name, *args, **kwargs))
 
     # Step 2: group parameters if correlated
     par_constraint = {p: id(flavio.default_parameters._parameters[p][1]) for p in dependent_par}
@@ -165,31 +411,56 @@ def sm_error_budget(obs_name, *args, N=50, **kwargs):
         v[value].append(key)
     dependent_par_lists = list(v.values())
 
-    # Step 3: for each of the (groups of) dependent parameters, determine the error
-    # analogous to the sm_uncertainty function. Normalize to the central
-    # prediction (so relative errors are returned)
+    # Step 3: for each of the (groups of) dependent parameters, generate
+    # parameter points where only this group is varied. For all groups
+    # together, these form a single batch of parameter points.
+    if method == 'MC':
+        par_random = flavio.default_parameters.get_random_all(size=N,
+                                                              sampling=sampling,
+                                                              random_state=random_state)
+        group_values = [np.array([par_random[key] for key in p]).T
+                        for p in dependent_par_lists]
+    else:
+        group_values = [flavio.statistics.functions.finite_difference_points(
+                            *flavio.default_parameters.get_gaussian_approximation(p))
+                        for p in dependent_par_lists]
+    sizes = [len(x) for x in group_values]
+    offsets = np.cumsum([0] + sizes)
+    par_arrays = par_central.copy()
+    for i, p in enumerate(dependent_par_lists):
+        for j, key in enumerate(p):
+            arr = np.full(offsets[-1], par_central[key], dtype=float)
+            arr[offsets[i]:offsets[i + 1]] = group_values[i][:, j]
+            par_arrays[key] = arr
+    if offsets[-1] > 0:
+        all_pred = _map_batch(partial(_obs_list_prediction_par_batch,
+                                      obs_list=[(obs_name,) + args],
+                                      wc_obj=wc_sm, kwargs=kwargs),
+                              par_arrays, threads, executor)[0]
+
+    # Step 4: determine the error of each group analogous to the
+    # sm_uncertainty function. Normalize to the central prediction (so
+    # relative errors are returned)
     individual_errors = {}
-    def make_par_random(keys, par_random):
-        par_tmp = par_central.copy()
-        for key in keys:
-            par_tmp[key] = par_random[key]
-        return par_tmp
-    for p in dependent_par_lists:
-        par_random_p = [make_par_random(p, pr) for pr in par_random]
-        all_pred = np.array([
-            obs.prediction_par(par, wc_sm, *args, **kwargs)
-            for par in par_random_p
-        ])
+    for i, p in enumerate(dependent_par_lists):
+        pred = all_pred[offsets[i]:offsets[i + 1]]
+        if method == 'MC':
+            err = np.std(pred)
+        else:
+            err = np.sqrt(flavio.statistics.functions.finite_difference_covariance(
+                pred[:, np.newaxis], order=_propagation_order[method])[0, 0])
         # for the dictionary key, use the list element if there is only 1,
         # otherwise use a tuple (which is hashable)
         if len(p) == 1:
             key = p[0]
         else:
             key = tuple(p)
-        individual_errors[key] = np.std(all_pred)/abs(pred_central)
+        individual_errors[key] = err/abs(pred_central)
     return individual_errors
 
-def sm_covariance(obs_list, N=100, par_vary='all', **kwargs):
+def sm_covariance(obs_list, N=100, par_vary='all', threads=1, executor=None,
+                  chunk_size=100, method='MC', sampling='random',
+                  target_rel_precision=None, random_state=None, **kwargs):
     """Get the covariance matrix of the Standard Model predictions for a
     list of observables.
 
@@ -204,35 +475,35 @@ def sm_covariance(obs_list, N=100, par_vary='all', **kwargs):
     The relative accuracy of the uncertainties returned is given by $1/\sqrt{2N}$.
     - `par_vary`: a list of parameters to vary. Defaults to 'all', i.e. all
     parameters are varied according to their probability distributions.
+    - `threads` (optional): if bigger than one, number of threads for parallel
+    computation of the covariance.
+    - `executor` (optional): an instance of `flavio.parallel.Executor` to use
+    for the parallel computation.
+    - `chunk_size` (optional): number of random parameter points that are
+    generated and evaluated at a time (default: 100). The covariance is
+    accumulated chunk by chunk, so memory consumption does not grow with `N`.
+    - `method` (optional): 'MC' (default) for Monte Carlo error propagation,
+    'linear' or 'quadratic' for error propagation with finite differences
+    (see `np_uncertainty`). For the latter, `N` and `chunk_size` are ignored.
+    - `sampling` (optional): 'random' (default), 'sobol', 'halton', or 'lhs'
+    (see `np_uncertainty`). The low-discrepancy sequence is continued from
+    chunk to chunk; for 'sobol', `N` and `chunk_size` should be powers of 2.
+    - `target_rel_precision` (optional): if given, `N` is the maximum number
+    of evaluations and no further chunks are evaluated once the estimated
+    relative statistical uncertainty of the standard deviations of all
+    observables is below this number.
+    - `random_state` (optional): seed or generator for the random parameter
+    values, see `np_uncertainty`.
     """
+    _check_method(method)
     wc_sm = flavio.physics.eft._wc_sm
-    par_central_all = flavio.default_parameters.get_central_all()
-    # par_random_all = [flavio.default_parameters.get_random_all() for i in range(N)]
-    par_random_all = flavio.default_parameters.get_random_all(size=N)
-    def par_random_some(par_random, par_central):
-        # take the central values for the parameters not to be varied
-        par1 = {k: v for k, v in par_central.items() if k not in par_vary}
-        # take the random values for the parameters to be varied
-        par2 = {k: v for k, v in par_random.items() if k in par_vary}
-        par1.update(par2) # merge them
-        return par1
-    if par_vary == 'all':
-        par_random = par_random_all
-        par_random = [{k: v[i] for k, v in par_random.items()} for i in range(N)]
-    else:
-        par_random = par_random_some(par_random_all, par_central_all)
-        par_random = [{k: v[i] for k, v in par_random.items()} for i in range(N)]
-    def get_prediction(obs, par):
-        if isinstance(obs, str):
-             obs_obj = flavio.classes.Observable[obs]
-             return obs_obj.prediction_par(par, wc_sm, **kwargs)
-        elif isinstance(obs, tuple):
-             obs_obj = flavio.classes.Observable[obs[0]]
-             return obs_obj.prediction_par(par, wc_sm, *obs[1:], **kwargs)
-    all_pred = np.array([
-        [get_prediction(obs, par)
-            for par in par_random
-        ]
-        for obs in obs_list
-    ])
-    return np.cov(all_pred)
+    if method != 'MC':
+        cov = _propagate_covariance(obs_list, wc_sm, par_vary,
+                                    _propagation_order[method],
+                                    threads, executor, kwargs)
+        return np.squeeze(cov)
+    covariance = _mc_covariance(obs_list, wc_sm, N, par_vary, threads,
+                                executor, chunk_size, sampling,
+                                target_rel_precision, kwargs, random_state)
+    # for a single observable, return a number like np.cov
+    return np.squeeze(covariance.covariance)
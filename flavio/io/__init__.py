@@ -1,3 +1,4 @@
 """Functions for input and output."""
 
 from . import yaml
+from . import cache
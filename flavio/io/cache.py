@@ -0,0 +1,270 @@
+"""On-disk cache for Standard Model predictions and uncertainties.
+
+If the setting `cache directory` in `flavio.config` is set to the path of a
+directory, the results of `flavio.sm_prediction`, `flavio.sm_uncertainty`, and
+`flavio.sm_error_budget` are stored in this directory as `.npz` files and
+reused in later sessions.
+
+The files are content-addressed: their name is a hash of everything the
+result depends on, i.e.
+
+- the observable name, arguments, and options like the number of random
+  evaluations,
+- the prediction function of the observable (its module, qualified name,
+  byte code, and the values it encloses),
+- the constraints on the parameters the observable depends on (only their
+  central values for central predictions),
+- the configuration `flavio.config`,
+- and the version of flavio.
+
+Changing any of these automatically leads to a recomputation, so the cache
+never has to be invalidated by hand. Outdated files can simply be deleted.
+
+Note that functions called by the prediction function are not part of the
+key: if the code of such a function is modified without changing the flavio
+version, outdated results are returned. In this case, the cache directory
+has to be cleared by hand.
+
+The same directory is used by `FastFit` to store the samples of predictions
+its SM covariance is computed from (see `load_samples` and `save_samples`).
+These are stored together with a hash of the prediction function of each
+observable, and recomputed if the function changes.
+"""
+
+import os
+import json
+import types
+import functools
+import hashlib
+import tempfile
+import numpy as np
+import flavio
+from flavio.config import config
+from flavio.statistics.probability import ProbabilityDistribution
+
+
+def get_directory():
+    """Return the cache directory set in `flavio.config`, or None if the disk
+    cache is disabled."""
+    return config['settings'].get('cache directory')
+
+
+def _update_hash(h, obj):
+    """Update the hash object `h` with a canonical representation of `obj`."""
+    if isinstance(obj, dict):
+        h.update(b'd')
+        for k in sorted(obj, key=repr):
+            _update_hash(h, k)
+            _update_hash(h, obj[k])
+    elif isinstance(obj, (list, tuple)):
+        h.update(b'l' if isinstance(obj, list) else b't')
+        for v in obj:
+            _update_hash(h, v)
+        h.update(b'e')
+    elif isinstance(obj, np.ndarray):
+        # the repr of large arrays is abbreviated, so use the raw data
+        h.update('a{}{}'.format(obj.dtype, obj.shape).encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, ProbabilityDistribution):
+        h.update(obj.class_to_string().encode())
+        _update_hash(h, obj.get_dict())
+    elif isinstance(obj, (types.FunctionType, types.MethodType,
+                          functools.partial)):
+        _update_function_hash(h, obj, set())
+    else:
+        h.update(repr(obj).encode())
+
+
+def _update_code_hash(h, code):
+    h.update(code.co_code)
+    h.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            # the repr of code objects contains their address
+            _update_code_hash(h, const)
+        else:
+            h.update(repr(const).encode())
+
+
+def _update_function_hash(h, function, seen):
+    """Update the hash object `h` with the code of a function and the values
+    it encloses."""
+    while isinstance(function, functools.partial):
+        _update_hash(h, (function.args, function.keywords))
+        function = function.func
+    function = getattr(function, '__func__', function)
+    h.update('f{}.{}'.format(getattr(function, '__module__', None),
+                             getattr(function, '__qualname__', None)).encode())
+    if id(function) in seen:
+        # recursive closure
+        return
+    seen.add(id(function))
+    code = getattr(function, '__code__', None)
+    if code is not None:
+        _update_code_hash(h, code)
+    for cell in getattr(function, '__closure__', None) or ():
+        try:
+            contents = cell.cell_contents
+        except ValueError:
+            # empty cell
+            continue
+        if isinstance(contents, types.FunctionType):
+            _update_function_hash(h, contents, seen)
+        else:
+            _update_hash(h, contents)
+
+
+def hash_key(*objects):
+    """Return a hexadecimal hash of the objects, which can be (nested) lists,
+    tuples, and dictionaries of numbers, strings, numpy arrays, probability
+    distributions, and functions."""
+    h = hashlib.sha256()
+    _update_hash(h, objects)
+    return h.hexdigest()
+
+
+def load(key, directory=None):
+    """Load the arrays stored under `key` as a dictionary, or return None
+    if there are none."""
+    directory = directory or get_directory()
+    path = os.path.join(directory, key + '.npz')
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            return dict(data)
+    except (OSError, ValueError):
+        # file does not exist or is corrupt
+        return None
+
+
+def save(key, directory=None, **arrays):
+    """Store the arrays under `key`.
+
+    The file is written atomically, so several processes can share a cache
+    directory."""
+    directory = directory or get_directory()
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp, os.path.join(directory, key + '.npz'))
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def _encode(value):
+    if isinstance(value, dict):
+        keys = [list(k) if isinstance(k, tuple) else k for k in value]
+        return {'keys': np.array(json.dumps(keys)),
+                'values': np.array(list(value.values()))}
+    return {'value': np.asarray(value)}
+
+
+def _decode(data):
+    if 'keys' in data:
+        keys = [tuple(k) if isinstance(k, list) else k
+                for k in json.loads(str(data['keys']))]
+        return dict(zip(keys, data['values'][()]))
+    return data['value'][()]
+
+
+def _parameter_key(parameters, central_only):
+    constraints = flavio.default_parameters
+    data = []
+    for p in sorted(parameters):
+        if p not in constraints._parameters:
+            data.append((p, None))
+        elif central_only:
+            data.append((p, constraints.get_central(p)))
+        else:
+            num, constraint = constraints._parameters[p]
+            data.append((p, num, constraint))
+    return data
+
+
+def cached(kind, obs_name, args, kwargs, compute, options=None,
+           central_only=False):
+    """Return a quantity computed for an observable, retrieving it from the
+    disk cache if possible.
+
+    Parameters:
+
+    - `kind`: string identifying the quantity, e.g. 'sm_uncertainty'
+    - `obs_name`, `args`, `kwargs`: the observable name and its arguments
+    - `compute`: function with a boolean argument `dependencies` returning a
+      tuple of the quantity (a number, array, or dictionary of numbers) and,
+      if `dependencies` is True, the set of parameters it depends on (and
+      None otherwise). The dependencies are only needed if the cache is
+      enabled.
+    - `options` (optional): further options the quantity depends on, e.g. the
+      number of random evaluations
+    - `central_only` (optional): if True, the quantity only depends on the
+      central values of the parameters rather than their full constraints
+    """
+    directory = get_directory()
+    if directory is None:
+        return compute(False)[0]
+    function = flavio.classes.Observable[obs_name].prediction.function
+    base = hash_key(kind, obs_name, args, kwargs, options, function,
+                    config, flavio.__version__)
+    dependencies = load(base, directory)
+    if dependencies is not None:
+        parameters = list(dependencies['parameters'])
+        key = hash_key(base, _parameter_key(parameters, central_only))
+        data = load(key, directory)
+        if data is not None:
+            return _decode(data)
+    value, parameters = compute(True)
+    parameters = sorted(parameters)
+    save(base, directory, parameters=np.array(parameters, dtype=str))
+    key = hash_key(base, _parameter_key(parameters, central_only))
+    save(key, directory, **_encode(value))
+    return value
+
+
+def samples_key(*objects):
+    """Return the key for `load_samples` and `save_samples` given the objects
+    the samples depend on, taking into account the configuration and the
+    version of flavio."""
+    return hash_key('samples', objects, config, flavio.__version__)
+
+
+def _encode_observables(observables):
+    return np.array(json.dumps([list(o) if isinstance(o, tuple) else o
+                                for o in observables]))
+
+
+def _decode_observables(data):
+    return [tuple(o) if isinstance(o, list) else o
+            for o in json.loads(str(data))]
+
+
+def load_samples(key, directory=None):
+    """Return a tuple `(observables, versions, points, predictions)` stored
+    under `key` with `save_samples`, or None if there are none.
+
+    `predictions` is an array of shape (N, len(observables)) with the
+    predictions of the observables at the N `points`."""
+    data = load(key, directory)
+    if data is None:
+        return None
+    return (_decode_observables(data['observables']),
+            [str(v) for v in data['versions']],
+            data['points'], data['predictions'])
+
+
+def save_samples(key, observables, versions, points, predictions,
+                 directory=None):
+    """Store the predictions of a list of observables at an array of points.
+
+    `versions` is a list of strings identifying how the predictions of each
+    observable have been computed, e.g. a hash of the prediction function
+    (see `hash_key`). Since the key does not depend on the observables, this
+    allows to detect outdated predictions when loading them.
+
+    Observables can be added or replaced later by saving the predictions of
+    a different list of observables at the same points under the same key."""
+    save(key, directory, observables=_encode_observables(observables),
+         versions=np.array(versions, dtype=str),
+         points=np.asarray(points), predictions=np.asarray(predictions))
@@ -0,0 +1,147 @@
+import unittest
+import tempfile
+import shutil
+import os
+import numpy as np
+import numpy.testing as npt
+import flavio
+from flavio.classes import Observable, Prediction, Measurement
+from flavio.statistics.probability import NormalDistribution
+
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        flavio.config['settings']['cache directory'] = self.directory
+        self.calls = []
+        def f(wc_obj, par):
+            self.calls.append(1)
+            return par['m_b'] * par['m_c']
+        Observable('test_obs cache')
+        Prediction('test_obs cache', f)
+        # modify a copy of the default parameters
+        self.par = flavio.default_parameters
+        flavio.default_parameters = self.par.copy()
+
+    def tearDown(self):
+        flavio.config['settings']['cache directory'] = None
+        flavio.default_parameters = self.par
+        del Observable['test_obs cache']
+        shutil.rmtree(self.directory)
+
+    def test_hash_key(self):
+        h = flavio.io.cache.hash_key
+        self.assertEqual(h({'a': 1, 'b': [2]}), h({'b': [2], 'a': 1}))
+        self.assertNotEqual(h([1, 2]), h((1, 2)))
+        self.assertNotEqual(h(np.zeros(2000)), h(np.r_[np.zeros(1999), 1]))
+        self.assertEqual(h(NormalDistribution(1, 2)), h(NormalDistribution(1, 2)))
+        self.assertNotEqual(h(NormalDistribution(1, 2)), h(NormalDistribution(1, 3)))
+
+    def test_sm_prediction(self):
+        pred = flavio.sm_prediction('test_obs cache')
+        self.assertEqual(flavio.sm_prediction('test_obs cache'), pred)
+        self.assertEqual(len(self.calls), 1)
+        # changing an irrelevant parameter does not lead to a recomputation
+        flavio.default_parameters.set_constraint('m_s', '0.1')
+        self.assertEqual(flavio.sm_prediction('test_obs cache'), pred)
+        self.assertEqual(len(self.calls), 1)
+        # changing the uncertainty does not affect the central value
+        flavio.default_parameters.set_constraint('m_b', '{} ± 1'.format(
+            flavio.default_parameters.get_central('m_b')))
+        self.assertEqual(flavio.sm_prediction('test_obs cache'), pred)
+        self.assertEqual(len(self.calls), 1)
+        flavio.default_parameters.set_constraint('m_b', '4')
+        self.assertAlmostEqual(flavio.sm_prediction('test_obs cache'),
+                               4 * flavio.default_parameters.get_central('m_c'))
+        self.assertEqual(len(self.calls), 2)
+        # the cache is disabled
+        flavio.config['settings']['cache directory'] = None
+        flavio.sm_prediction('test_obs cache')
+        self.assertEqual(len(self.calls), 3)
+
+    def test_prediction_function(self):
+        pred = flavio.sm_prediction('test_obs cache')
+        # redefining the prediction leads to a recomputation
+        Prediction('test_obs cache', lambda wc_obj, par: 2 * par['m_b'])
+        self.assertAlmostEqual(flavio.sm_prediction('test_obs cache'),
+                               2 * flavio.default_parameters.get_central('m_b'))
+        h = flavio.io.cache.hash_key
+        def f(x):
+            return lambda y: x * y
+        self.assertEqual(h(f(1)), h(f(1)))
+        self.assertNotEqual(h(f(1)), h(f(2)))
+        self.assertNotEqual(h(lambda y: y), h(lambda y: 2 * y))
+
+    def test_sm_uncertainty(self):
+        unc = flavio.sm_uncertainty('test_obs cache', N=10)
+        n = len(self.calls)
+        self.assertEqual(flavio.sm_uncertainty('test_obs cache', N=10), unc)
+        self.assertEqual(len(self.calls), n)
+        flavio.default_parameters.set_constraint('m_b', '{} ± 1'.format(
+            flavio.default_parameters.get_central('m_b')))
+        self.assertNotEqual(flavio.sm_uncertainty('test_obs cache', N=10), unc)
+        self.assertGreater(len(self.calls), n)
+
+    def test_random_state(self):
+        unc = flavio.sm_uncertainty('test_obs cache', N=10, random_state=1)
+        n = len(self.calls)
+        self.assertEqual(flavio.sm_uncertainty('test_obs cache', N=10, random_state=1), unc)
+        self.assertEqual(len(self.calls), n)
+        # different seeds and unseeded calls are stored separately
+        self.assertNotEqual(flavio.sm_uncertainty('test_obs cache', N=10, random_state=2), unc)
+        flavio.sm_uncertainty('test_obs cache', N=10)
+        self.assertEqual(len(os.listdir(self.directory)), 6)
+        # generators are not cached
+        flavio.sm_uncertainty('test_obs cache', N=10,
+                              random_state=np.random.default_rng(1))
+        self.assertEqual(len(os.listdir(self.directory)), 6)
+
+    def test_sm_error_budget(self):
+        budget = flavio.sm_error_budget('test_obs cache', N=10)
+        n = len(self.calls)
+        budget_cached = flavio.sm_error_budget('test_obs cache', N=10)
+        self.assertEqual(len(self.calls), n)
+        self.assertEqual(set(budget), {'m_b', 'm_c'})
+        self.assertDictEqual(budget_cached, budget)
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+
+    def test_fastfit_sm_covariance(self):
+        Observable('test_obs cache 2')
+        Prediction('test_obs cache 2', lambda wc_obj, par: par['m_b'])
+        m = Measurement('measurement of test_obs cache')
+        m.add_constraint(['test_obs cache', 'test_obs cache 2'],
+            flavio.statistics.probability.MultivariateNormalDistribution(
+                [20, 5], [[1, 0], [0, 0.1]]))
+        def fit(name, observables):
+            return flavio.statistics.fits.FastFit(
+                name, flavio.default_parameters, [], ['m_b', 'm_c'],
+                observables)
+        fit1 = fit('fastfit cache 1', ['test_obs cache'])
+        cov1 = fit1.get_sm_covariance(N=20)
+        n = len(self.calls)
+        # the stored predictions are reused
+        npt.assert_array_equal(fit1.get_sm_covariance(N=20), cov1)
+        self.assertEqual(len(self.calls), n)
+        fit2 = fit('fastfit cache 2', ['test_obs cache 2', 'test_obs cache'])
+        cov2 = fit2.get_sm_covariance(N=20)
+        # only the new observable has been computed
+        self.assertEqual(len(self.calls), n)
+        self.assertAlmostEqual(cov2[1, 1], cov1)
+        fit3 = fit('fastfit cache 3', ['test_obs cache 2'])
+        self.assertAlmostEqual(fit3.get_sm_covariance(N=20), cov2[0, 0])
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+        with self.assertWarns(UserWarning):
+            # the stored random points are used
+            fit3.get_sm_covariance(N=20, random_state=1)
+        # a redefined prediction is recomputed
+        Prediction('test_obs cache 2', lambda wc_obj, par: 2 * par['m_b'])
+        self.assertAlmostEqual(fit3.get_sm_covariance(N=20), 4 * cov2[0, 0])
+        self.assertAlmostEqual(fit2.get_sm_covariance(N=20)[1, 1], cov1)
+        self.assertEqual(len(self.calls), n)
+        # a different number of samples needs new predictions
+        fit1.get_sm_covariance(N=10)
+        self.assertEqual(len(self.calls), n + 10)
+        for name in ('fastfit cache 1', 'fastfit cache 2', 'fastfit cache 3'):
+            flavio.statistics.fits.FastFit.del_instance(name)
+        Measurement.del_instance('measurement of test_obs cache')
+        Observable.del_instance('test_obs cache 2')
@@ -0,0 +1,132 @@
+"""Persistent pools of worker processes for parallel computations.
+
+Starting a `multiprocessing.Pool` is expensive compared to many of the tasks
+flavio runs in parallel (e.g. computing the uncertainty of a single
+observable). The `Executor` class defined here keeps its worker processes
+alive between calls, so that repeated calls of functions like
+`flavio.np_uncertainty` with `threads > 1` only pay the start-up cost once.
+
+With the 'fork' start method of `multiprocessing` (the default on Linux),
+worker processes inherit the state of flavio (observables, predictions,
+parameter constraints, measurements, and configuration) at the time they are
+started. If this state changes in the main process, the workers are restarted
+automatically the next time the executor is used.
+
+With the 'spawn' start method (the default on Windows and macOS), workers
+start from a fresh import of flavio instead, so changes made at runtime in
+the main process are not seen by the workers.
+"""
+
+import multiprocessing
+import atexit
+import flavio
+
+
+def _state_fingerprint():
+    """Return a fingerprint of the global state of flavio that is inherited
+    by the worker processes.
+
+    The fingerprint holds references to the predictions and constraints,
+    which are compared by identity, rather than their ids, so that a new
+    object cannot be mistaken for a deleted one that had the same id."""
+    observables = tuple((name, obs.prediction)
+                        for name, obs in flavio.classes.Observable.instances.items())
+    parameters = tuple(flavio.default_parameters._parameters.items())
+    return (observables, flavio.default_parameters, parameters,
+            flavio.classes.Measurement._revision, repr(flavio.config))
+
+
+def _initialize_worker():
+    """Initializer of the worker processes.
+
+    This makes sure flavio is imported (and all observables are defined) in
+    the workers even if they are started with the 'spawn' method."""
+    import flavio
+
+
+class Executor(object):
+    """A pool of worker processes that is kept alive between calls.
+
+    Parameters:
+
+    - `threads`: number of worker processes. If 1, all tasks are executed
+      serially in the main process.
+
+    Methods:
+
+    - map(function, iterable): apply `function` to every element of
+      `iterable` in parallel and return the list of results
+    - close(): terminate the worker processes. They will be restarted
+      when the executor is used again.
+
+    The executor can also be used as a context manager, in which case the
+    worker processes are terminated when leaving the context:
+
+    ```
+    with flavio.parallel.Executor(4) as executor:
+        for obs in observables:
+            flavio.sm_uncertainty(obs, executor=executor)
+    ```
+    """
+
+    def __init__(self, threads):
+        if threads < 1:
+            raise ValueError("The number of threads must be a positive integer")
+        self.threads = threads
+        self._pool = None
+        self._fingerprint = None
+
+    def __repr__(self):
+        return "Executor({})".format(self.threads)
+
+    def _get_pool(self):
+        fingerprint = _state_fingerprint()
+        if self._pool is not None and fingerprint != self._fingerprint:
+            # the state of flavio has changed since the workers were started
+            self.close()
+        if self._pool is None:
+            self._pool = multiprocessing.Pool(self.threads,
+                                              initializer=_initialize_worker)
+            self._fingerprint = fingerprint
+        return self._pool
+
+    def map(self, function, iterable, chunksize=None):
+        """Apply `function` to every element of `iterable` and return the
+        list of results."""
+        if self.threads == 1:
+            return list(map(function, iterable))
+        return self._get_pool().map(function, iterable, chunksize)
+
+    def close(self):
+        """Terminate the worker processes."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+            self._fingerprint = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+# executors shared by all functions that accept a `threads` argument
+_executors = {}
+
+
+def get_executor(threads):
+    """Return the shared executor with `threads` worker processes.
+
+    The executor is created on first use and its workers are kept alive until
+    the interpreter exits."""
+    if threads not in _executors:
+        _executors[threads] = Executor(threads)
+    return _executors[threads]
+
+
+@atexit.register
+def _close_executors():
+    for executor in _executors.values():
+        executor.close()
@@ -7,7 +7,7 @@ from flavio.physics.bdecays.wilsoncoefficients import wctot_dict
 from flavio.config import config
 from flavio.physics.running import running
 from .amplitudes import *
-from flavio.classes import Observable, Prediction
+from flavio.classes import Observable, Prediction, EvaluationSession
 import flavio
 
 
@@ -124,13 +124,12 @@ class BVllObservable(object):
         self.scale = config['renormalization scale']['bvll']
         self.label = meson_quark[(B,V)] + lep + lep # e.g. bsmumu, bdtautau
         self.wctot_dict = wctot_dict(wc_obj, self.label, self.scale, par)
-        self._ff = {}
-        self._wceff = {}
-        self._wceff_bar = {}
-        self._ha = {}
-        self._ha_bar = {}
-        self._j = {}
-        self._j_bar = {}
+        # the q2-dependent caches are shared by all instances for the same
+        # decay within an evaluation session (see flavio.classes)
+        (self._ff, self._wceff, self._wceff_bar, self._ha, self._ha_bar,
+         self._j, self._j_bar) = EvaluationSession.cached(
+            par, wc_obj, ('BVllObservable', B, V, lep),
+            lambda: tuple({} for i in range(7)))
         self.ml = par['m_'+lep]
         self.mB = par['m_'+B]
         self.mV = par['m_'+V]
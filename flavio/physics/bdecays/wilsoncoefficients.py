@@ -73,7 +73,17 @@ for qq in _fcnc:
 def wctot_dict(wc_obj, sector, scale, par, nf_out=5):
     r"""Get a dictionary with the total (SM + new physics) values  of the
     $\Delta F=1$ Wilson coefficients at a given scale, given a
-    WilsonCoefficients instance."""
+    WilsonCoefficients instance.
+
+    Within an active `flavio.classes.EvaluationSession`, the result is only
+    computed once."""
+    tot_dict = flavio.classes.EvaluationSession.cached(
+        par, wc_obj, ('wctot_dict', sector, scale, nf_out),
+        lambda: _wctot_dict(wc_obj, sector, scale, par, nf_out))
+    # return a copy as the dictionary is modified by some callers
+    return tot_dict.copy()
+
+def _wctot_dict(wc_obj, sector, scale, par, nf_out=5):
     wc_np_dict = wc_obj.get_wc(sector, scale, par, nf_out=nf_out)
     if nf_out == 5:
         wc_sm = wcsm_nf5(scale)
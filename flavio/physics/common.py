@@ -9,7 +9,17 @@ def conjugate_par(par_dict):
     This assumes that the only CP-odd parameters are `gamma` or `delta` (the
     CKM phase in the Wolfenstein or standard parametrization)."""
     cp_odd = ['gamma', 'delta']
-    return {k: -v if k in cp_odd else v for k, v in par_dict.items()}
+    if isinstance(par_dict, dict):
+        # bypass the access tracking of `flavio.functions.AwareDict`
+        items = dict.items(par_dict)
+    else:
+        items = par_dict.items()
+    par_conj = {k: -v if k in cp_odd else v for k, v in items}
+    if hasattr(par_dict, 'derive'):
+        # keep track of the parameters accessed via the conjugate dictionary
+        # (see `flavio.functions.AwareDict`)
+        return par_dict.derive(par_conj)
+    return par_conj
 
 def conjugate_wc(wc_dict):
     """Given a dictionary of Wilson coefficients, return the dictionary where
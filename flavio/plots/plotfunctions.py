@@ -324,13 +324,15 @@ def density_contour_data(x, y, covariance_factor=None, n_bins=None, n_sigma=(1,
       default (1, 2) draws the contours containing approximately 68 and 95%
       of the points, respectively.
     """
+    if np.ptp(x) == 0 or np.ptp(y) == 0:
+        raise ValueError("The points must not all have the same x or y "
+                         "coordinate")
     if n_bins is None:
         n_bins = min(10*int(sqrt(len(x))), 200)
-    f_binned, x_edges, y_edges = np.histogram2d(x, y, normed=True, bins=n_bins)
+    x_edges = np.linspace(np.min(x), np.max(x), n_bins + 1)
+    y_edges = np.linspace(np.min(y), np.max(y), n_bins + 1)
     x_centers = (x_edges[:-1] + x_edges[1:])/2.
     y_centers = (y_edges[:-1] + y_edges[1:])/2.
-    x_mean = np.mean(x_centers)
-    y_mean = np.mean(y_centers)
     dataset = np.vstack([x, y])
 
     d = 2 # no. of dimensions
@@ -343,14 +345,12 @@ def density_contour_data(x, y, covariance_factor=None, n_bins=None, n_sigma=(1,
         _covariance_factor = covariance_factor
 
     cov = np.cov(dataset) * _covariance_factor**2
-    gaussian_kernel = scipy.stats.multivariate_normal(mean=[x_mean, y_mean], cov=cov)
+    gaussian_kernel = scipy.stats.multivariate_normal(mean=[0, 0], cov=cov)
 
     x_grid, y_grid = np.meshgrid(x_centers, y_centers)
-    xy_grid = np.vstack([x_grid.ravel(), y_grid.ravel()])
-    f_gauss = gaussian_kernel.pdf(xy_grid.T)
-    f_gauss = np.reshape(f_gauss, (len(x_centers), len(y_centers))).T
-
-    f = scipy.signal.fftconvolve(f_binned, f_gauss, mode='same').T
+    # binned kernel density estimate, linear in the number of points
+    f = flavio.statistics.functions.binned_kde(dataset.T, [x_centers, y_centers],
+                                               gaussian_kernel.pdf).T
     f = f/f.sum()
 
     def find_confidence_interval(x, pdf, confidence_level):
@@ -404,7 +404,7 @@ def density_contour(x, y, covariance_factor=None, n_bins=None, n_sigma=(1, 2),
 
 
 def likelihood_contour_data(log_likelihood, x_min, x_max, y_min, y_max,
-              n_sigma=1, steps=20, threads=1):
+              n_sigma=1, steps=20, threads=1, vectorized=False):
     r"""Generate data required to plot coloured confidence contours (or bands)
     given a log likelihood function.
 
@@ -420,11 +420,19 @@ def likelihood_contour_data(log_likelihood, x_min, x_max, y_min, y_max,
       this number squared times the computing time of one `log_likelihood` call!)
     - `threads`: number of threads, defaults to 1. If greater than one,
       computation of z values will be done in parallel.
+    - `vectorized`: if True, `log_likelihood` is called only once with an
+      array of shape `(steps**2, 2)` containing all grid points and must
+      return an array of length `steps**2`. Can e.g. be used with the
+      `log_likelihood_batch` method of a FastFit instance. `threads` is
+      ignored in this case.
     """
     _x = np.linspace(x_min, x_max, steps)
     _y = np.linspace(y_min, y_max, steps)
     x, y = np.meshgrid(_x, _y)
-    if threads == 1:
+    if vectorized:
+        xy = np.array([x, y]).reshape(2, steps**2).T
+        z = -2*np.asarray(log_likelihood(xy)).reshape((steps, steps))
+    elif threads == 1:
         @np.vectorize
         def chi2_vect(x, y): # needed for evaluation on meshgrid
             return -2*log_likelihood([x,y])
@@ -452,7 +460,7 @@ def likelihood_contour_data(log_likelihood, x_min, x_max, y_min, y_max,
 
 
 def likelihood_contour(log_likelihood, x_min, x_max, y_min, y_max,
-              n_sigma=1, steps=20, threads=1,
+              n_sigma=1, steps=20, threads=1, vectorized=False,
               **kwargs):
     r"""Plot coloured confidence contours (or bands) given a log likelihood
     function.
@@ -467,6 +475,7 @@ def likelihood_contour(log_likelihood, x_min, x_max, y_min, y_max,
       contours.
     - `steps`: number of grid steps in each dimension (total computing time is
       this number squared times the computing time of one `log_likelihood` call!)
+    - `threads`, `vectorized`: see `likelihood_contour_data`
 
     All remaining keyword arguments are passed to the `contour` function
     and allow to control the presentation of the plot (see docstring of
@@ -475,7 +484,8 @@ def likelihood_contour(log_likelihood, x_min, x_max, y_min, y_max,
     data = likelihood_contour_data(log_likelihood=log_likelihood,
                                 x_min=x_min, x_max=x_max,
                                 y_min=y_min, y_max=y_max,
-                                n_sigma=n_sigma, steps=steps, threads=threads)
+                                n_sigma=n_sigma, steps=steps, threads=threads,
+                                vectorized=vectorized)
     data.update(kwargs) #  since we cannot do **data, **kwargs in Python <3.5
     return contour(**data)
 
@@ -137,6 +137,10 @@ class TestPlots(unittest.TestCase):
         data2 = likelihood_contour_data(dummy_loglikelihood,
                                         -2, 2, -3, 3, threads=2)
         npt.assert_array_equal(data2['z'], data['z'])
+        # test vectorized computation
+        data3 = likelihood_contour_data(lambda xy: np.array([dummy_loglikelihood(p) for p in xy]),
+                                        -2, 2, -3, 3, vectorized=True)
+        npt.assert_array_equal(data3['z'], data['z'])
 
     def test_smooth_histogram(self):
         # just check this doesn't raise and error
@@ -11,7 +11,6 @@ from flavio.math.optimize import minimize_robust
 from collections import Counter, OrderedDict
 import warnings
 import inspect
-from multiprocessing import Pool
 import scipy.optimize
 import pickle
 from functools import partial
@@ -210,6 +209,8 @@ class Fit(flavio.NamedInstanceClass):
         self.fit_wc_priors = fit_wc_priors
         self.observables = observables
         self.input_scale = input_scale
+        # see _get_measurement_plans
+        self._measurement_plans = None
         self._warn_meas_corr
 
         # check that observables are constrained
@@ -302,6 +303,31 @@ class Fit(flavio.NamedInstanceClass):
     def get_measurements(self):
         """Return a list of all the measurements currently defined that
         constrain any of the fit observables."""
+        return list(self._get_measurement_plans()[0])
+
+    def _get_measurement_plans(self):
+        """Return a tuple `(names, plans)` with the names of the measurements
+        constraining the fit observables and the corresponding instances of
+        `LogProbabilityPlan` for the array of fit observables.
+
+        The result is cached until a measurement is created, deleted, or
+        modified, or the attributes `observables`, `exclude_measurements`, or
+        `include_measurements` are changed."""
+        # copies of the lists, so that in-place changes are detected
+        key = (flavio.classes.Measurement._revision,) + tuple(
+            None if l is None else tuple(l) for l in
+            (self.observables, self.exclude_measurements,
+             self.include_measurements))
+        cached = getattr(self, '_measurement_plans', None)
+        if cached is None or cached[0] != key:
+            names = self._find_measurements()
+            # observables not included in the fit are ignored
+            plans = [flavio.Measurement[m].get_logprobability_plan(self.observables)
+                     for m in names]
+            self._measurement_plans = (key, names, plans)
+        return self._measurement_plans[1:]
+
+    def _find_measurements(self):
         all_measurements = []
         for m_name, m_obj in flavio.classes.Measurement.instances.items():
             if m_name.split(' ')[0] == 'Pseudo-measurement':
@@ -448,12 +474,16 @@ class Fit(flavio.NamedInstanceClass):
         If par is False, fit parameters are set to their central values.
         If nuisance is False, nuisance parameters are set to their central values.
         """
-        d = self.array_to_dict(x)
+        n_fit_p = len(self.fit_parameters)
+        n_nui_p = len(self.nuisance_parameters)
+        x = np.asarray(x)
         par_dict = self.parameters_central.copy()
+        # update the dictionary directly instead of going through array_to_dict
         if par:
-            par_dict.update(d['fit_parameters'])
+            par_dict.update(zip(self.fit_parameters, x[:n_fit_p].tolist()))
         if nuisance:
-            par_dict.update(d['nuisance_parameters'])
+            par_dict.update(zip(self.nuisance_parameters,
+                                x[n_fit_p:n_fit_p + n_nui_p].tolist()))
         return par_dict
 
     def get_wc_obj(self, x):
@@ -483,13 +513,15 @@ class Fit(flavio.NamedInstanceClass):
         prob_dict = self.fit_wc_priors.get_logprobability_all(wc_dict)
         return sum([p for obj, p in prob_dict.items()])
 
-    def get_predictions(self, x, par=True, nuisance=True, wc=True):
+    def get_predictions(self, x, par=True, nuisance=True, wc=True,
+                        observables=None):
         """Get a dictionary with predictions for all observables given an input
         array.
 
         If par is False, fit parameters are set to their central values.
         If nuisance is False, nuisance parameters are set to their central values.
         If wc is False, Wilson coefficients are set to their SM values.
+        If a list of `observables` is given, only these are predicted.
         """
         par_dict = self.get_par_dict(x, par=par, nuisance=nuisance)
         if wc:
@@ -497,47 +529,49 @@ class Fit(flavio.NamedInstanceClass):
         else:
             wc_obj = flavio.physics.eft._wc_sm
         all_predictions = {}
-        for observable in self.observables:
-            if isinstance(observable, tuple):
-                obs_name = observable[0]
-                _inst = flavio.classes.Observable[obs_name]
-                all_predictions[observable] = _inst.prediction_par(par_dict, wc_obj, *observable[1:])
-            else:
-                _inst = flavio.classes.Observable[observable]
-                all_predictions[observable] = _inst.prediction_par(par_dict, wc_obj)
+        # share intermediate results between the observables
+        if observables is None:
+            observables = self.observables
+        with flavio.classes.EvaluationSession(par_dict, wc_obj):
+            for observable in observables:
+                if isinstance(observable, tuple):
+                    obs_name = observable[0]
+                    _inst = flavio.classes.Observable[obs_name]
+                    all_predictions[observable] = _inst.prediction_par(par_dict, wc_obj, *observable[1:])
+                else:
+                    _inst = flavio.classes.Observable[observable]
+                    all_predictions[observable] = _inst.prediction_par(par_dict, wc_obj)
         return all_predictions
 
-    def get_predictions_array(self, x, **kwargs):
-        pred = self.get_predictions(x, **kwargs)
-        return np.array([pred[obs] for obs in self.observables])
+    def get_predictions_array(self, x, observables=None, **kwargs):
+        if observables is None:
+            observables = self.observables
+        pred = self.get_predictions(x, observables=observables, **kwargs)
+        return np.array([pred[obs] for obs in observables])
 
     def log_prior_parameters(self, x):
         """Return the prior probability (or frequentist likelihood) for all
         fit and (!) nuisance parameters given an input array"""
-        par_dict = self.get_par_dict(x)
-        exclude_parameters = list(set(par_dict.keys())-set(self.fit_parameters)-set(self.nuisance_parameters))
-        prob_dict = self.par_obj.get_logprobability_all(par_dict, exclude_parameters=exclude_parameters)
-        return sum([p for obj, p in prob_dict.items()])
+        parameters = list(self.fit_parameters) + list(self.nuisance_parameters)
+        # constraints on all other parameters are ignored
+        plan = self.par_obj.get_logprobability_plan(parameters)
+        return plan.logprobability(np.asarray(x)[:len(parameters)])
 
     def log_prior_nuisance_parameters(self, x):
         """Return the prior probability (or frequentist likelihood) for all
         nuisance parameters given an input array"""
-        par_dict = self.get_par_dict(x)
-        exclude_parameters = list(set(par_dict.keys())-set(self.nuisance_parameters))
-        prob_dict = self.par_obj.get_logprobability_all(par_dict, exclude_parameters=exclude_parameters)
-        return sum([p for obj, p in prob_dict.items()])
+        n_fit_p = len(self.fit_parameters)
+        n_nui_p = len(self.nuisance_parameters)
+        plan = self.par_obj.get_logprobability_plan(self.nuisance_parameters)
+        return plan.logprobability(np.asarray(x)[n_fit_p:n_fit_p+n_nui_p])
 
     def log_likelihood_exp(self, x):
         """Return the logarithm of the likelihood function (not including the
         prior)"""
-        predictions = self.get_predictions(x)
+        predictions = self.get_predictions_array(x)
         ll = 0.
-        for measurement in self.get_measurements:
-            m_obj = flavio.Measurement[measurement]
-            m_obs = m_obj.all_parameters
-            exclude_observables = set(m_obs) - set(self.observables)
-            prob_dict = m_obj.get_logprobability_all(predictions, exclude_parameters=exclude_observables)
-            ll += sum(prob_dict.values())
+        for plan in self._get_measurement_plans()[1]:
+            ll += plan.logprobability(predictions)
         return ll
 
 
@@ -639,39 +673,22 @@ class FastFit(Fit):
         self._get_predictions_array_sm = partial(self.get_predictions_array,
                                                  par=False, nuisance=True,
                                                  wc=False)
+        # see make_surrogate
+        self.surrogate = None
+        self._surrogate_changes = None
 
 
     # a method to get the mean and covariance of all measurements of all
     # observables of interest
-    def _get_central_covariance_experiment(self, N=5000):
+    def _get_central_covariance_experiment(self, N=5000, random_state=None):
+        if random_state is not None:
+            random_state = flavio.statistics.functions.get_random_generator(random_state)
         means = []
         covariances = []
         for measurement in self.get_measurements:
             m_obj = flavio.Measurement[measurement]
-            # obs. included in the fit and constrained by this measurement
-            our_obs = set(m_obj.all_parameters).intersection(self.observables)
-            # construct a dict. containing a vector of N random values for
-            # each of these observables
-            random_dict = {}
-            for obs in our_obs:
-                random_dict[obs] = np.zeros(N)
-            for i in range(N):
-                m_random = m_obj.get_random_all()
-                for obs in our_obs:
-                    random_dict[obs][i] = m_random[obs]
-            # mean = np.zeros(len(self.observables))
-            random_arr = np.zeros((len(self.observables), N))
-            for i, obs in enumerate(self.observables):
-                #     n = len(random_dict[obs])
-                if obs in our_obs:
-                    random_arr[i] = random_dict[obs]
-            mean = np.mean(random_arr, axis=1)
-            covariance = np.cov(random_arr)
-            for i, obs in enumerate(self.observables):
-                if obs not in our_obs:
-                    covariance[:,i] = 0
-                    covariance[i, :] = 0
-                    covariance[i, i] = np.inf
+            mean, covariance = self._get_central_covariance_measurement(m_obj, N,
+                                                                        random_state)
             means.append(mean)
             covariances.append(covariance)
         # if there is only a single measuement
@@ -697,7 +714,49 @@ class FastFit(Fit):
                                 axis=0))
             return weighted_mean, weighted_covariance
 
-    def get_exp_central_covariance(self, N=5000, force=True):
+    def _get_central_covariance_measurement(self, m_obj, N, random_state=None):
+        """Return the mean vector and the covariance matrix of the fit
+        observables for a single measurement.
+
+        Normal and multivariate normal constraints are treated analytically,
+        all other constraints are sampled with `N` random values. Fit
+        observables not constrained by the measurement get infinite
+        variance."""
+        index = {obs: i for i, obs in enumerate(self.observables)}
+        n = len(self.observables)
+        mean = np.zeros(n)
+        covariance = np.zeros((n, n))
+        constrained = np.zeros(n, dtype=bool)
+        for constraint, parameters in m_obj._constraints:
+            # positions of the fit observables in the constraint and in the
+            # vector of fit observables
+            pos = [(j, index[p]) for j, p in enumerate(parameters)
+                   if p in index and m_obj._parameters.get(p) == (j, constraint)]
+            if not pos:
+                continue
+            j, i = (np.array(a) for a in zip(*pos))
+            if isinstance(constraint, NormalDistribution):
+                c_mean = np.array([constraint.central_value])
+                c_cov = np.array([[constraint.standard_deviation**2]])
+            elif isinstance(constraint, MultivariateNormalDistribution):
+                c_mean = np.asarray(constraint.central_value)
+                c_cov = np.asarray(constraint.covariance)
+            else:
+                r = np.reshape(constraint.get_random(size=N, random_state=random_state),
+                               (N, -1))
+                c_mean = np.mean(r, axis=0)
+                c_cov = np.atleast_2d(np.cov(r.T))
+            mean[i] = c_mean[j]
+            covariance[np.ix_(i, i)] = c_cov[np.ix_(j, j)]
+            constrained[i] = True
+        unconstrained = np.flatnonzero(~constrained)
+        covariance[unconstrained, unconstrained] = np.inf
+        if n == 1:
+            # for a single observable, return a number like np.cov
+            return mean, covariance[0, 0]
+        return mean, covariance
+
+    def get_exp_central_covariance(self, N=5000, force=True, random_state=None):
         """Return the experimental central values and the covriance matrix of
         all observables.
 
@@ -707,9 +766,13 @@ class FastFit(Fit):
           to it; more means less random fluctuations.)
         - `force`: optional; if True (default), will recompute covariance even
           if it already has been computed.
+        - `random_state`: optional; integer seed, `numpy.random.SeedSequence`,
+          or `numpy.random.Generator` for reproducible results. By default,
+          the global numpy random state is used.
         """
         if self._exp_central_covariance is None or force:
-            self._exp_central_covariance = self._get_central_covariance_experiment(N=N)
+            self._exp_central_covariance = self._get_central_covariance_experiment(N=N,
+                                                                                   random_state=random_state)
         elif N != 5000:
             warnings.warn("Argument N={} ignored ".format(N) + \
                           "as experimental covariance has already been " + \
@@ -771,22 +834,121 @@ class FastFit(Fit):
     def _get_random_nuisance(self, *args):
         return self._get_random(par=False, nuisance=True, wc=False)
 
-    def _get_covariance_sm(self, N=100, threads=1):
-        if threads == 1:
-            X_map = map(self._get_random_nuisance, range(N))
-            pred_map = map(self._get_predictions_array_sm, X_map)
+    def _get_random_nuisance_array(self, N, random_state=None):
+        """Return an array of shape (N, dimension) with random values for all
+        nuisance parameters and central values for all fit parameters."""
+        n_fit_p = len(self.fit_parameters)
+        n_nui_p = len(self.nuisance_parameters)
+        arr = np.zeros((N, self.dimension))
+        arr[:, :n_fit_p] = self.get_central_fit_parameters
+        if n_nui_p > 0:
+            all_random = self.par_obj.get_random_all(size=N, random_state=random_state)
+            arr[:, n_fit_p:n_fit_p+n_nui_p] = np.array(
+                [all_random[p] for p in self.nuisance_parameters]).T
+        return arr
+
+    def _get_predictions_array_sm_list(self, X, observables=None):
+        """Return an array of SM predictions for each row of the array X."""
+        return np.array([self._get_predictions_array_sm(x, observables=observables)
+                         for x in X])
+
+    def _get_finite_difference_nuisance_array(self):
+        """Return an array with the points for the propagation of the
+        nuisance parameter uncertainties with finite differences and central
+        values for all fit parameters."""
+        n_fit_p = len(self.fit_parameters)
+        n_nui_p = len(self.nuisance_parameters)
+        central, covariance = self.par_obj.get_gaussian_approximation(self.nuisance_parameters)
+        points = flavio.statistics.functions.finite_difference_points(central, covariance)
+        arr = np.zeros((len(points), self.dimension))
+        arr[:, :n_fit_p] = self.get_central_fit_parameters
+        arr[:, n_fit_p:n_fit_p+n_nui_p] = points
+        return arr
+
+    def _get_covariance_sm(self, N=100, threads=1, executor=None, method='MC',
+                           random_state=None):
+        if method not in ('MC', 'linear', 'quadratic'):
+            raise ValueError("Unknown method: {}".format(method))
+        n_fit_p = len(self.fit_parameters)
+        n_nui_p = len(self.nuisance_parameters)
+        directory = flavio.io.cache.get_directory()
+        samples = None
+        if directory is not None:
+            key = self._sm_covariance_samples_key(N, method)
+            samples = flavio.io.cache.load_samples(key, directory)
+        # dictionary of the form {observable: (version, predictions)}
+        stored = {}
+        if samples is not None:
+            # reuse the points and the predictions of a previous fit
+            observables, versions, points, predictions = samples
+            stored = dict(zip(observables, zip(versions, predictions.T)))
+            X = np.zeros((len(points), self.dimension))
+            X[:, :n_fit_p] = self.get_central_fit_parameters
+            X[:, n_fit_p:n_fit_p+n_nui_p] = points
+            if method == 'MC' and random_state is not None:
+                warnings.warn("The SM covariance is computed from random "
+                              "points stored in the cache directory, so "
+                              "`random_state` is ignored.")
+        elif method == 'MC':
+            # the random points are generated here rather than in the
+            # workers, so the result does not depend on `threads`
+            X = self._get_random_nuisance_array(N, random_state=random_state)
+        else:
+            X = self._get_finite_difference_nuisance_array()
+        if directory is not None:
+            versions = {obs: self._prediction_version(obs)
+                        for obs in self.observables}
         else:
-            pool = Pool(threads)
-            X_map = pool.map(self._get_random_nuisance, range(N))
-            pred_map = pool.map(self._get_predictions_array_sm, X_map)
-            pool.close()
-            pool.join()
-        pred_arr = np.empty((N, len(self.observables)))
-        for i, pred_i in enumerate(pred_map):
-            pred_arr[i] = pred_i
-        return np.cov(pred_arr.T)
-
-    def get_sm_covariance(self, N=100, threads=1, force=True):
+            versions = dict.fromkeys(self.observables)
+        # observables that are not stored or whose prediction has changed
+        missing = [obs for obs in self.observables
+                   if obs not in stored or stored[obs][0] != versions[obs]]
+        if missing:
+            if executor is None:
+                executor = flavio.parallel.get_executor(threads)
+            new_predictions = np.concatenate(executor.map(
+                            partial(self._get_predictions_array_sm_list,
+                                    observables=missing),
+                            np.array_split(X, min(executor.threads, len(X)))))
+            for obs, column in zip(missing, new_predictions.T):
+                stored[obs] = (versions[obs], column)
+            if directory is not None:
+                flavio.io.cache.save_samples(
+                    key, list(stored), [v for v, _ in stored.values()],
+                    X[:, n_fit_p:n_fit_p+n_nui_p],
+                    np.column_stack([c for _, c in stored.values()]),
+                    directory)
+        pred_arr = np.column_stack([stored[obs][1] for obs in self.observables])
+        if method == 'MC':
+            return np.cov(pred_arr.T)
+        order = 1 if method == 'linear' else 2
+        cov = flavio.statistics.functions.finite_difference_covariance(pred_arr, order=order)
+        # for a single observable, return a number like np.cov
+        return np.squeeze(cov)
+
+    @staticmethod
+    def _prediction_version(observable):
+        """Return a hash identifying the prediction function of an
+        observable, see `flavio.io.cache.save_samples`."""
+        if isinstance(observable, tuple):
+            observable = observable[0]
+        function = flavio.classes.Observable[observable].prediction.function
+        return flavio.io.cache.hash_key(function)
+
+    def _sm_covariance_samples_key(self, N, method):
+        """Return the key of the samples of SM predictions stored on disk.
+
+        It does not depend on the observables, so the samples can be shared
+        by fits with different observables."""
+        nuisance = [(p,) + tuple(self.par_obj._parameters[p])
+                    for p in self.nuisance_parameters]
+        return flavio.io.cache.samples_key('FastFit SM covariance', method,
+                                           N if method == 'MC' else None,
+                                           self.par_obj.get_central_all(),
+                                           nuisance)
+
+    def get_sm_covariance(self, N=100, threads=1, force=True, executor=None,
+                          method='MC', random_state=None):
         """Return the covriance matrix of the SM predictions of all observables
         under variation of all nuisance parameters.
 
@@ -798,9 +960,32 @@ class FastFit(Fit):
           parallelization)
         - `force`: optional; if True (default), will recompute covariance even
           if it already has been computed.
+        - `executor`: optional; an instance of `flavio.parallel.Executor` to
+          use for the parallel computation.
+        - `method`: optional; 'MC' (default) for Monte Carlo error
+          propagation, 'linear' for linear error propagation with finite
+          differences in the Gaussian approximation of the nuisance parameter
+          constraints (requires 2n+1 evaluations for n nuisance parameters), or
+          'quadratic' to include second-order terms. `N` is ignored for the
+          latter two.
+        - `random_state`: optional; integer seed, `numpy.random.SeedSequence`,
+          or `numpy.random.Generator` for reproducible results. By default,
+          the global numpy random state is used.
+
+        If the `cache directory` setting in `flavio.config` is not null, the
+        SM predictions the covariance is computed from are stored on disk
+        (see `flavio.io.cache`). They are reused by any fit with the same
+        nuisance parameters, parameter constraints, `N`, and `method`.
+        If the fit contains observables that are not stored yet, or whose
+        prediction function has changed, only these are computed at the
+        stored points and added to the store. If stored points are reused,
+        `random_state` has no effect and a warning is issued.
         """
         if self._sm_covariance is None or force:
-            self._sm_covariance = self._get_covariance_sm(N=N, threads=threads)
+            self._sm_covariance = self._get_covariance_sm(N=N, threads=threads,
+                                                          executor=executor,
+                                                          method=method,
+                                                          random_state=random_state)
         elif N != 100:
             warnings.warn("Argument N={} ignored ".format(N) + \
                           "as SM covariance has already " + \
@@ -845,7 +1030,9 @@ class FastFit(Fit):
         else:
             self._sm_covariance = d['covariance'][permutation][:,permutation]
 
-    def make_measurement(self, N=100, Nexp=5000, threads=1, force=False, force_exp=False):
+    def make_measurement(self, N=100, Nexp=5000, threads=1, force=False,
+                         force_exp=False, executor=None, method='MC',
+                         random_state=None):
         """Initialize the fit by producing a pseudo-measurement containing both
         experimental uncertainties as well as theory uncertainties stemming
         from nuisance parameters.
@@ -863,9 +1050,23 @@ class FastFit(Fit):
           already has been computed. Defaults to False.
         - `force_exp`: if True, will recompute experimental central values and
           covariance even if they have already been computed. Defaults to False.
+        - `executor`: an instance of `flavio.parallel.Executor` to use for the
+          SM covariance computation instead of `threads`.
+        - `method`: method for the SM covariance computation, see
+          `get_sm_covariance`. Defaults to 'MC'.
+        - `random_state`: integer seed, `numpy.random.SeedSequence`, or
+          `numpy.random.Generator` used for both covariances.
+
+        An approximation created by `make_surrogate` is discarded.
         """
-        central_exp, cov_exp = self.get_exp_central_covariance(Nexp, force=force_exp)
-        cov_sm = self.get_sm_covariance(N, force=force, threads=threads)
+        self.surrogate = None
+        if random_state is not None:
+            random_state = flavio.statistics.functions.get_random_generator(random_state)
+        central_exp, cov_exp = self.get_exp_central_covariance(Nexp, force=force_exp,
+                                                               random_state=random_state)
+        cov_sm = self.get_sm_covariance(N, force=force, threads=threads,
+                                        executor=executor, method=method,
+                                        random_state=random_state)
         covariance = cov_exp + cov_sm
         # add the Pseudo-measurement
         m = flavio.classes.Measurement('Pseudo-measurement for FastFit instance: ' + self.name)
@@ -912,14 +1113,163 @@ class FastFit(Fit):
     def log_likelihood(self, x):
         """Return the logarithm of the likelihood. Note that there is no prior
         probability for nuisance parameters, which have been integrated out.
-        Priors for fit parameters are ignored."""
-         # set nuisance parameters to their central values!
-        predictions = self.get_predictions(self.shortarray_to_array(x), nuisance=False)
+        Priors for fit parameters are ignored.
+
+        If `make_surrogate` has been called, the approximated predictions are
+        used within the region where the approximation has been determined."""
+        surrogate = self._get_surrogate()
+        if surrogate is not None and surrogate.contains(x):
+            predictions = surrogate.predict(x)
+        else:
+            # set nuisance parameters to their central values!
+            predictions = self.get_predictions_array(self.shortarray_to_array(x), nuisance=False)
         m_obj = flavio.Measurement['Pseudo-measurement for FastFit instance: ' + self.name]
-        m_obs = m_obj.all_parameters
-        prob_dict = m_obj.get_logprobability_all(predictions)
-        ll = sum(prob_dict.values())
-        return ll
+        return m_obj.get_logprobability_plan(self.observables).logprobability(predictions)
+
+    def _get_predictions_array_list(self, X):
+        """Return an array of predictions for each row of the array X of fit
+        parameters and Wilson coefficients (with nuisance parameters set to
+        their central values).
+
+        Rows with the same Wilson coefficients are evaluated together, so
+        vectorized predictions are called once for all values of the fit
+        parameters (see `flavio.classes.Prediction`)."""
+        n_fit_p = len(self.fit_parameters)
+        # identical points are only evaluated once
+        X_unique, inverse = np.unique(X, axis=0, return_inverse=True)
+        predictions = np.empty((len(X_unique), len(self.observables)))
+        if n_fit_p == 0:
+            for k, x in enumerate(X_unique):
+                predictions[k] = self.get_predictions_array(
+                    self.shortarray_to_array(x), nuisance=False)
+            return predictions[inverse.ravel()]
+        _, wc_groups = np.unique(X_unique[:, n_fit_p:], axis=0,
+                                 return_inverse=True)
+        wc_groups = wc_groups.ravel()
+        for g in range(wc_groups.max() + 1):
+            rows = np.flatnonzero(wc_groups == g)
+            par_arrays = dict(self.parameters_central)
+            for i, p in enumerate(self.fit_parameters):
+                par_arrays[p] = X_unique[rows, i]
+            wc_obj = self.get_wc_obj(self.shortarray_to_array(X_unique[rows[0]]))
+            predictions[rows] = flavio.functions._obs_list_prediction_par_batch(
+                par_arrays, self.observables, wc_obj, {}).T
+        return predictions[inverse.ravel()]
+
+    def log_likelihood_batch(self, X, threads=1, executor=None):
+        """Return an array with the logarithm of the likelihood for every row
+        of the array `X` of shape (M, d), where each row is an input for
+        `log_likelihood`.
+
+        Vectorized predictions are evaluated for all points with the same
+        Wilson coefficients in a single call. The remaining predictions are
+        computed in parallel if `threads` is bigger than one or an instance
+        of `flavio.parallel.Executor` is given as `executor`. The
+        pseudo-measurement is then evaluated for all points at once.
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        surrogate = self._get_surrogate()
+        if surrogate is None:
+            inside = np.zeros(len(X), dtype=bool)
+        else:
+            inside = surrogate.contains(X)
+        predictions = np.empty((len(X), len(self.observables)))
+        if np.any(inside):
+            predictions[inside] = surrogate.predict(X[inside])
+        if not np.all(inside):
+            predictions[~inside] = self._get_predictions_array_batch(
+                X[~inside], threads, executor)
+        m_obj = flavio.Measurement['Pseudo-measurement for FastFit instance: ' + self.name]
+        plan = m_obj.get_logprobability_plan(self.observables)
+        return plan.logprobability(predictions)
+
+    def _get_predictions_array_batch(self, X, threads=1, executor=None):
+        if executor is None:
+            executor = flavio.parallel.get_executor(threads)
+        return np.concatenate(executor.map(
+                    self._get_predictions_array_list,
+                    np.array_split(X, max(1, min(executor.threads, len(X))))))
+
+    def make_surrogate(self, scale=1, N=None, tolerance=1e-3, threads=1,
+                       executor=None, random_state=None):
+        r"""Replace the predictions in `log_likelihood` and
+        `log_likelihood_batch` by a fast approximation.
+
+        For fixed nuisance parameters, the predictions of most observables
+        are quadratic polynomials, or ratios of them, in the Wilson
+        coefficients. The predictions are computed at `N` random points and
+        the coefficients of these polynomials are determined by a fit
+        (see `flavio.statistics.functions.QuadraticSurrogate`). The
+        approximation is then checked at further random points. Observables
+        for which a quadratic polynomial is not precise enough are fitted
+        as ratios of quadratic polynomials.
+
+        `make_measurement` must have been called before.
+
+        Parameters:
+
+        - `scale`: optional; half-width of the region around the central
+          fit parameters and the SM point (all Wilson coefficients
+          vanishing) where the points are drawn. Either a number or an array
+          with one entry per fit parameter and Wilson coefficient.
+        - `N`: optional; number of points used for the fit. Defaults to four
+          times the number of polynomial coefficients.
+        - `tolerance`: optional; maximum allowed deviation of the
+          approximation at the validation points in units of the uncertainty
+          of the pseudo-measurement. If it is exceeded, a `ValueError` is
+          raised.
+        - `threads`, `executor`: optional; parallel computation of the
+          predictions, see `log_likelihood_batch`.
+        - `random_state`: optional; seed or generator for the random points
+          (see `flavio.statistics.functions.get_random_generator`).
+
+        The approximation is only used for points within the region
+        described above; outside, the exact predictions are computed. It is
+        discarded when `make_measurement` is called again or a constraint of
+        the parameters is modified. Set the attribute `surrogate` to None to
+        use the exact predictions everywhere.
+        """
+        m_obj = flavio.Measurement['Pseudo-measurement for FastFit instance: ' + self.name]
+        constraint = m_obj._parameters[self.observables[0]][1]
+        sigma = np.atleast_1d(constraint.get_error_right())
+        n_fit_p = len(self.fit_parameters)
+        d = n_fit_p + len(self.fit_wc_names)
+        center = np.zeros(d)
+        center[:n_fit_p] = self.get_central_fit_parameters
+        scale = np.broadcast_to(np.asarray(scale, dtype=float), (d,))
+        # number of coefficients of a quadratic polynomial
+        T = 1 + d + d * (d + 1) // 2
+        if N is None:
+            N = 4 * T
+        n_val = max(10, T)
+        rng = flavio.statistics.functions.get_random_generator(random_state)
+        X = center + scale * rng.uniform(-1, 1, size=(N + n_val, d))
+        Y = self._get_predictions_array_batch(X, threads, executor)
+        X_fit, Y_fit, X_val, Y_val = X[:N], Y[:N], X[N:], Y[N:]
+        Surrogate = flavio.statistics.functions.QuadraticSurrogate
+        def deviation(surrogate):
+            return np.max(np.abs(surrogate.predict(X_val) - Y_val), axis=0) / sigma
+        surrogate = Surrogate.fit(X_fit, Y_fit, center, scale)
+        failed = deviation(surrogate) > tolerance
+        if np.any(failed):
+            surrogate = Surrogate.fit(X_fit, Y_fit, center, scale, rational=failed)
+            failed = deviation(surrogate) > tolerance
+        if np.any(failed):
+            raise ValueError("The predictions of the observables {} cannot be "
+                             "approximated by ratios of quadratic polynomials "
+                             "within the tolerance".format(
+                             [o for o, f in zip(self.observables, failed) if f]))
+        self.surrogate = surrogate
+        self._surrogate_changes = self.par_obj._changes
+        return surrogate
+
+    def _get_surrogate(self):
+        """Return the surrogate created by `make_surrogate`, or None if there
+        is none or the parameter constraints have changed since."""
+        if (self.surrogate is not None
+                and self._surrogate_changes != self.par_obj._changes):
+            self.surrogate = None
+        return self.surrogate
 
     def best_fit(self, **kwargs):
         r"""Compute the best fit point in the space of fit parameters and Wilson
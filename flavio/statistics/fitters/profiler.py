@@ -5,7 +5,6 @@ import flavio
 import scipy.optimize
 from flavio.math.optimize import minimize_robust, maximize_robust
 from functools import partial
-from multiprocessing import Pool
 import warnings
 
 def par_shift_scale(par_obj, parameters):
@@ -156,27 +155,30 @@ class Profiler(object):
                 n0_i = n_scaled
         return z, n
 
-    def optimize_list(self, x, n0, threads=1, **kwargs):
+    def optimize_list(self, x, n0, threads=1, executor=None, **kwargs):
         """Maximize the nuisance likelihood for a list of points x, using
         n0 as initial values for the nuisance parameters at the first point.
 
+        If an instance of `flavio.parallel.Executor` is given as `executor`,
+        it is used instead of `threads` for the parallel computation.
+
         Returns z, n
         - z are the optimized log-likelihood values
         - n are the optimized nuisance parameters
         """
-        if threads == 1:
-            return self._optimize_list(x, n0, **kwargs)
-        else:
-            x_split = np.array_split(x, threads)
-            with Pool(threads) as pool:
-                zn = pool.map(partial(optimize_list_worker,
-                              n0=n0,
-                              profiler=self,
-                              **kwargs),
-                              x_split)
-            z = np.concatenate([zi for zi, ni in zn])
-            n = np.concatenate([ni for zi, ni in zn])
-            return z, n
+        if executor is None:
+            if threads == 1:
+                return self._optimize_list(x, n0, **kwargs)
+            executor = flavio.parallel.get_executor(threads)
+        x_split = np.array_split(x, executor.threads)
+        zn = executor.map(partial(optimize_list_worker,
+                          n0=n0,
+                          profiler=self,
+                          **kwargs),
+                          x_split)
+        z = np.concatenate([zi for zi, ni in zn])
+        n = np.concatenate([ni for zi, ni in zn])
+        return z, n
 
 
 class Profiler1D(Profiler):
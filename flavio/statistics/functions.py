@@ -1,6 +1,9 @@
 """Auxiliary functions for statistics."""
 
+import numpy as np
 import scipy.stats
+import scipy.signal
+import itertools
 from functools import lru_cache
 from math import sqrt
 
@@ -38,3 +41,331 @@ def pull(delta_chi2, dof):
     chi2_ndof = scipy.stats.chi2(dof)
     cl_delta_chi2 = chi2_ndof.cdf(delta_chi2)
     return scipy.stats.norm.ppf(0.5+cl_delta_chi2/2)
+
+class RunningCovariance(object):
+    r"""Streaming estimate of the mean and covariance of a vector of random
+    variables.
+
+    Samples are added in chunks with the `update` method and combined with
+    the running estimate using the pairwise generalization of Welford's
+    algorithm, so the memory needed does not grow with the number of samples.
+    The third and fourth central moments of the individual variables are
+    tracked as well to estimate the statistical uncertainty of the standard
+    deviations.
+
+    Attributes:
+
+    - `N`: number of samples added so far
+    - `mean`: the sample mean vector
+    - `covariance`: the sample covariance matrix (normalized by `N - 1`)
+    - `std_relative_error`: the estimated relative statistical uncertainty
+      of the standard deviations
+    """
+
+    def __init__(self, n):
+        """Initialize the estimate for `n` random variables."""
+        self.N = 0
+        self.mean = np.zeros(n)
+        self._m2 = np.zeros((n, n))
+        self._m3 = np.zeros(n)
+        self._m4 = np.zeros(n)
+
+    def update(self, x):
+        """Add samples. `x` must be an array of shape (M, n) containing M
+        samples of the n random variables."""
+        x = np.asarray(x, dtype=float)
+        m = len(x)
+        if m == 0:
+            return
+        mean_x = np.mean(x, axis=0)
+        dx = x - mean_x
+        m2_x = dx.T @ dx
+        m3_x = np.sum(dx**3, axis=0)
+        m4_x = np.sum(dx**4, axis=0)
+        delta = mean_x - self.mean
+        n = self.N
+        N = n + m
+        # combine the central moments of the two sets (Pebay 2008)
+        m2_a = np.diag(self._m2)
+        m2_b = np.diag(m2_x)
+        self._m4 += (m4_x + delta**4 * n * m * (n**2 - n * m + m**2) / N**3
+                     + 6 * delta**2 * (n**2 * m2_b + m**2 * m2_a) / N**2
+                     + 4 * delta * (n * m3_x - m * self._m3) / N)
+        self._m3 += (m3_x + delta**3 * n * m * (n - m) / N**2
+                     + 3 * delta * (n * m2_b - m * m2_a) / N)
+        self._m2 += m2_x + np.outer(delta, delta) * n * m / N
+        self.mean += delta * m / N
+        self.N = N
+
+    @property
+    def covariance(self):
+        """Return the sample covariance matrix."""
+        return self._m2 / (self.N - 1)
+
+    @property
+    def std_relative_error(self):
+        r"""Return the estimated relative statistical uncertainty of the
+        standard deviations, $\frac{1}{2}\sqrt{(\mu_4/\sigma^4 - 1)/N}$.
+
+        Variables without spread have vanishing uncertainty."""
+        m2 = np.diag(self._m2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            kurtosis = np.where(m2 > 0, self.N * self._m4 / m2**2, 1)
+        return np.sqrt(np.clip(kurtosis - 1, 0, None) / self.N) / 2
+
+
+def covariance_root(covariance):
+    r"""Return a matrix $L$ with $L L^T$ equal to the covariance matrix.
+
+    This is the Cholesky decomposition if the covariance is positive
+    definite. For singular covariance matrices (e.g. if some variables have
+    no uncertainty), the eigendecomposition is used instead."""
+    covariance = np.atleast_2d(covariance)
+    try:
+        return np.linalg.cholesky(covariance)
+    except np.linalg.LinAlgError:
+        w, v = np.linalg.eigh(covariance)
+        return v * np.sqrt(np.clip(w, 0, None))
+
+
+def get_random_generator(random_state=None):
+    """Return the source of random numbers for a `random_state` argument.
+
+    `random_state` can be
+
+    - None: the `numpy.random` module itself, i.e. the global random state
+      seeded with `numpy.random.seed`,
+    - an instance of `numpy.random.Generator` or `numpy.random.RandomState`,
+      which is returned unchanged,
+    - an integer or a `numpy.random.SeedSequence`, from which a new
+      `numpy.random.Generator` is created.
+
+    In all cases, the returned object has the methods `uniform`, `normal`,
+    `lognormal`, and `multivariate_normal`. To get reproducible results for
+    several calls, pass the same `Generator` rather than the same integer.
+    """
+    if random_state is None:
+        return np.random
+    if isinstance(random_state, (np.random.Generator, np.random.RandomState)):
+        return random_state
+    return np.random.default_rng(random_state)
+
+
+def get_qmc_engine(sampling, d, random_state=None):
+    """Return a `scipy.stats.qmc` engine generating `d`-dimensional samples.
+
+    `sampling` can be 'sobol' or 'halton' for scrambled low-discrepancy
+    sequences, or 'lhs' for Latin hypercube sampling. The engine is seeded
+    from `random_state` (see `get_random_generator`), by default from the
+    global numpy random state."""
+    try:
+        from scipy.stats import qmc
+    except ImportError:
+        raise ImportError("Sampling method '{}' requires scipy>=1.7".format(sampling))
+    seed = get_random_generator(random_state)
+    if not isinstance(seed, np.random.Generator):
+        seed = seed.randint(2**31)
+    if sampling == 'sobol':
+        return qmc.Sobol(d, scramble=True, seed=seed)
+    elif sampling == 'halton':
+        return qmc.Halton(d, scramble=True, seed=seed)
+    elif sampling == 'lhs':
+        return qmc.LatinHypercube(d, seed=seed)
+    raise ValueError("Unknown sampling method: {}".format(sampling))
+
+
+def finite_difference_points(central, covariance):
+    r"""Return the points for the propagation of uncertainties with finite
+    differences.
+
+    In the coordinates $z = L^{-1}(x - x_0)$, where $L L^T$ is the covariance
+    matrix, the parameters are uncorrelated with unit variance. The points
+    returned are the central value $x_0$ and $x_0 \pm L e_k$ for all
+    directions $k$ with non-vanishing variance, i.e. an array of shape
+    `(2 * n + 1, len(central))`. See `finite_difference_covariance`."""
+    central = np.asarray(central, dtype=float)
+    L = covariance_root(covariance)
+    shifts = L.T[np.any(L != 0, axis=0)]
+    return central + np.concatenate([np.zeros((1, len(central))),
+                                     shifts, -shifts])
+
+
+def finite_difference_covariance(predictions, order=1):
+    r"""Return the covariance matrix of predictions evaluated at the points
+    returned by `finite_difference_points`.
+
+    `predictions` must be an array of shape `(2 * n + 1, M)` for `M`
+    predicted quantities. For `order=1`, the predictions are linearized,
+    i.e. the covariance is $G G^T$ with the gradient $G$ obtained by central
+    differences. For `order=2`, the contribution $\frac{1}{2}\sum_k h_k h_k^T$
+    of the diagonal second derivatives $h_k$ is added (second derivatives
+    mixing different directions are neglected)."""
+    predictions = np.asarray(predictions, dtype=float)
+    n = (len(predictions) - 1) // 2
+    f0 = predictions[0]
+    fp = predictions[1:n + 1]
+    fm = predictions[n + 1:]
+    G = (fp - fm) / 2
+    covariance = G.T @ G
+    if order == 2:
+        H = fp + fm - 2 * f0
+        covariance += H.T @ H / 2
+    elif order != 1:
+        raise ValueError("Order must be 1 or 2")
+    return covariance
+
+
+def linear_binning(data, grid):
+    r"""Distribute data points onto a regular grid with linear binning.
+
+    Every point contributes to the $2^d$ surrounding grid points with
+    weights depending linearly on its distance to them. Compared to a
+    histogram, this considerably reduces the discretization error of
+    binned kernel density estimates. Points outside the grid are assigned
+    to the closest grid points.
+
+    Parameters:
+
+    - `data`: array of shape `(N,)` or, for `d` dimensions, `(N, d)`
+    - `grid`: 1D array of at least two evenly spaced values in ascending
+      order or, for `d` dimensions, a list of `d` such arrays
+
+    Returns an array of shape `(len(grid),)` or
+    `(len(grid[0]), ..., len(grid[d - 1]))` with the weights, which sum to N.
+    """
+    if np.ndim(grid[0]) == 0:
+        grids = [np.asarray(grid, dtype=float)]
+    else:
+        grids = [np.asarray(g, dtype=float) for g in grid]
+    for g in grids:
+        if len(g) < 2 or g[1] <= g[0]:
+            raise ValueError("The grid must consist of at least two points "
+                             "in ascending order")
+    data = np.asarray(data, dtype=float).reshape(-1, len(grids))
+    shape = tuple(len(g) for g in grids)
+    lower = []
+    fraction = []
+    for k, g in enumerate(grids):
+        # position in units of the grid spacing
+        t = np.clip((data[:, k] - g[0]) / (g[1] - g[0]), 0, len(g) - 1)
+        i = np.minimum(np.floor(t).astype(int), len(g) - 2)
+        lower.append(i)
+        fraction.append(t - i)
+    weights = np.zeros(np.prod(shape))
+    for corner in itertools.product((0, 1), repeat=len(grids)):
+        index = np.ravel_multi_index([i + c for i, c in zip(lower, corner)], shape)
+        w = np.prod([f if c else 1 - f for f, c in zip(fraction, corner)], axis=0)
+        weights += np.bincount(index, weights=w, minlength=len(weights))
+    return weights.reshape(shape)
+
+
+def binned_kde(data, grid, kernel_pdf):
+    r"""Kernel density estimate of data points evaluated on a regular grid.
+
+    The data are binned onto the grid with `linear_binning` and the result
+    is convolved with the kernel using a fast Fourier transform, so the cost
+    is linear in the number of points and $\mathcal{O}(G \log G)$ in the number
+    of grid points $G$.
+
+    Parameters:
+
+    - `data`, `grid`: see `linear_binning`
+    - `kernel_pdf`: function returning the density of the kernel given an
+      array of offsets of shape `(...)` in one or `(..., d)` in `d` dimensions
+
+    The kernel does not need to be symmetric or centered at zero, but it is
+    only evaluated at offsets smaller than the extent of the grid, so the
+    grid has to be wide enough to contain the data as well as the support of
+    the kernel around them. A `ValueError` is raised if the grid is
+    degenerate, e.g. because it was built from the range of data points that
+    are all equal.
+
+    Returns the density on the grid as an array with the same shape as
+    returned by `linear_binning`.
+    """
+    weights = linear_binning(data, grid)
+    if np.ndim(grid[0]) == 0:
+        grids = [np.asarray(grid, dtype=float)]
+    else:
+        grids = [np.asarray(g, dtype=float) for g in grid]
+    # the kernel at all possible offsets between grid points
+    offsets = [(g[1] - g[0]) * np.arange(1 - len(g), len(g)) for g in grids]
+    if len(grids) == 1:
+        kernel = kernel_pdf(offsets[0])
+    else:
+        kernel = kernel_pdf(np.stack(np.meshgrid(*offsets, indexing='ij'), axis=-1))
+    density = scipy.signal.fftconvolve(weights, kernel, mode='valid')
+    # remove negative numerical noise from the FFT
+    density[density < 0] = 0
+    return density / np.sum(weights)
+
+
+class QuadraticSurrogate(object):
+    r"""Fast approximation of a vector-valued function of $d$ variables by
+    ratios of quadratic polynomials.
+
+    Every component is approximated as $p_i(x)/(1 + q_i(x))$, where $p_i$ is
+    a quadratic polynomial and $q_i$ a quadratic polynomial without constant
+    term, in the rescaled variables $(x - \text{center})/\text{scale}$.
+    For components that are polynomials themselves, $q_i = 0$.
+
+    Instances are created from samples of the function with the `fit` class
+    method.
+    """
+
+    def __init__(self, center, scale, numerator, denominator):
+        self.center = np.asarray(center, dtype=float)
+        self.scale = np.asarray(scale, dtype=float)
+        # arrays of shape (T, n) and (T - 1, n) with the coefficients of the
+        # T monomials for the n components
+        self.numerator = numerator
+        self.denominator = denominator
+
+    @staticmethod
+    def monomials(X):
+        r"""Return an array of shape (M, T) with the values of the monomials
+        $1$, $x_i$, $x_i x_j$ ($i \le j$) for an array `X` of shape (M, d)."""
+        X = np.asarray(X, dtype=float)
+        i, j = np.triu_indices(X.shape[1])
+        return np.hstack([np.ones((len(X), 1)), X, X[:, i] * X[:, j]])
+
+    @classmethod
+    def fit(cls, X, Y, center, scale, rational=None):
+        """Determine the coefficients by a least-squares fit to the samples
+        `Y` (shape (M, n)) of the function at the points `X` (shape (M, d)).
+
+        `rational` (optional) is a boolean array of length n specifying the
+        components to fit with a non-trivial denominator. This requires
+        M to be at least the number of coefficients, `2T - 1`.
+        """
+        Y = np.asarray(Y, dtype=float)
+        phi = cls.monomials((np.asarray(X, dtype=float) - center) / scale)
+        T = phi.shape[1]
+        numerator = np.linalg.lstsq(phi, Y, rcond=None)[0]
+        denominator = np.zeros((T - 1, Y.shape[1]))
+        if rational is not None:
+            for i in np.flatnonzero(rational):
+                # linear in the coefficients: p(x) - y q(x) = y
+                A = np.hstack([phi, -Y[:, [i]] * phi[:, 1:]])
+                c = np.linalg.lstsq(A, Y[:, i], rcond=None)[0]
+                numerator[:, i] = c[:T]
+                denominator[:, i] = c[T:]
+        return cls(center, scale, numerator, denominator)
+
+    def contains(self, X):
+        """Return True if the point `X` of shape (d,) lies within the region
+        `center ± scale` where the approximation has been determined, or a
+        boolean array of shape (M,) for an array `X` of shape (M, d)."""
+        X = np.asarray(X, dtype=float)
+        return np.all(np.abs(X - self.center) <= np.abs(self.scale), axis=-1)
+
+    def predict(self, X):
+        """Return the approximated function values for an array `X` of shape
+        (M, d) as an array of shape (M, n), or for a single point of shape
+        (d,) as an array of shape (n,)."""
+        X = np.asarray(X, dtype=float)
+        phi = self.monomials(np.atleast_2d((X - self.center) / self.scale))
+        Y = (phi @ self.numerator) / (1 + phi[:, 1:] @ self.denominator)
+        if X.ndim == 1:
+            return Y[0]
+        return Y
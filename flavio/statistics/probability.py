@@ -2,11 +2,14 @@
 
 import numpy as np
 import scipy.stats
+import scipy.linalg
 from scipy.interpolate import interp1d, RegularGridInterpolator
 import scipy.signal
+import scipy.special
 import math
 from flavio.math.functions import normal_logpdf, normal_pdf
-from flavio.statistics.functions import confidence_level
+from flavio.statistics.functions import confidence_level, binned_kde, \
+    get_random_generator
 import warnings
 import inspect
 from collections import OrderedDict
@@ -148,18 +151,17 @@ class UniformDistribution(ProbabilityDistribution):
         return 'flavio.statistics.probability.UniformDistribution' + \
                '({}, {})'.format(self.central_value, self.half_range)
 
-    def get_random(self, size=None):
-        return np.random.uniform(self.range[0], self.range[1], size)
+    def get_random(self, size=None, random_state=None):
+        rng = get_random_generator(random_state)
+        return rng.uniform(self.range[0], self.range[1], size)
 
-    def _logpdf(self, x):
-        if x < self.range[0] or x >= self.range[1]:
-            return -np.inf
-        else:
-            return -math.log(2 * self.half_range)
+    def ppf(self, x):
+        return self.range[0] + 2 * self.half_range * np.asarray(x)
 
     def logpdf(self, x):
-        _lpvect = np.vectorize(self._logpdf)
-        return _lpvect(x)
+        x = np.asarray(x)
+        inside = (x >= self.range[0]) & (x < self.range[1])
+        return np.where(inside, -math.log(2 * self.half_range), -np.inf)[()]
 
     def get_error_left(self, nsigma=1):
         """Return the lower error"""
@@ -187,12 +189,15 @@ class DeltaDistribution(ProbabilityDistribution):
         return 'flavio.statistics.probability.DeltaDistribution' + \
                '({})'.format(self.central_value)
 
-    def get_random(self, size=None):
+    def get_random(self, size=None, random_state=None):
         if size is None:
             return self.central_value
         else:
             return self.central_value * np.ones(size)
 
+    def ppf(self, x):
+        return self.central_value * np.ones(np.shape(x))
+
     def logpdf(self, x):
         if np.ndim(x) == 0:
             if x == self.central_value:
@@ -232,8 +237,9 @@ class NormalDistribution(ProbabilityDistribution):
         return 'flavio.statistics.probability.NormalDistribution' + \
                '({}, {})'.format(self.central_value, self.standard_deviation)
 
-    def get_random(self, size=None):
-        return np.random.normal(self.central_value, self.standard_deviation, size)
+    def get_random(self, size=None, random_state=None):
+        rng = get_random_generator(random_state)
+        return rng.normal(self.central_value, self.standard_deviation, size)
 
     def logpdf(self, x):
         return normal_logpdf(x, self.central_value, self.standard_deviation)
@@ -304,17 +310,18 @@ class LogNormalDistribution(ProbabilityDistribution):
         return 'flavio.statistics.probability.LogNormalDistribution' + \
                '({}, {})'.format(self.central_value, self.factor)
 
-    def get_random(self, size=None):
+    def get_random(self, size=None, random_state=None):
         s = self.central_sign
-        return s * np.random.lognormal(self.log_central_value, self.log_standard_deviation, size)
+        rng = get_random_generator(random_state)
+        return s * rng.lognormal(self.log_central_value, self.log_standard_deviation, size)
 
     def logpdf(self, x):
         s = self.central_sign
-        return scipy.stats.lognorm.logpdf(s * x, scale=np.exp(self.log_central_value), s=self.log_standard_deviation)
+        return scipy.stats.lognorm.logpdf(s * np.asarray(x), scale=np.exp(self.log_central_value), s=self.log_standard_deviation)
 
     def pdf(self, x):
         s = self.central_sign
-        return scipy.stats.lognorm.pdf(s * x, scale=np.exp(self.log_central_value), s=self.log_standard_deviation)
+        return scipy.stats.lognorm.pdf(s * np.asarray(x), scale=np.exp(self.log_central_value), s=self.log_standard_deviation)
 
     def cdf(self, x):
         if self.central_sign == -1:
@@ -371,37 +378,28 @@ class AsymmetricNormalDistribution(ProbabilityDistribution):
                                  self.right_deviation,
                                  self.left_deviation)
 
-    def get_random(self, size=None):
-        if size is None:
-            return self._get_random()
-        else:
-            return np.array([self._get_random() for i in range(size)])
-
-    def _get_random(self):
-        r = np.random.uniform()
-        a = abs(self.left_deviation /
-                (self.right_deviation + self.left_deviation))
-        if r > a:
-            x = abs(np.random.normal(0, self.right_deviation))
-            return self.central_value + x
-        else:
-            x = abs(np.random.normal(0, self.left_deviation))
-            return self.central_value - x
-
-    def _logpdf(self, x):
-        # values of the PDF at the central value
-        if x < self.central_value:
-            # left-hand side: scale factor
-            r = 2 * self.p_right / (self.p_left + self.p_right)
-            return math.log(r) + normal_logpdf(x, self.central_value, self.left_deviation)
-        else:
-            # left-hand side: scale factor
-            r = 2 * self.p_left / (self.p_left + self.p_right)
-            return math.log(r) + normal_logpdf(x, self.central_value, self.right_deviation)
+    def get_random(self, size=None, random_state=None):
+        rng = get_random_generator(random_state)
+        return self.ppf(rng.uniform(size=size))[()]
+
+    def ppf(self, x):
+        x = np.asarray(x, dtype=float)
+        # probability to be left of the central value
+        a = self.left_deviation / (self.right_deviation + self.left_deviation)
+        left = self.left_deviation * scipy.stats.norm.ppf(
+            np.minimum(x, a) / (2 * a))
+        right = self.right_deviation * scipy.stats.norm.ppf(
+            (np.maximum(x - a, 0) / (1 - a) + 1) / 2)
+        return self.central_value + np.where(x < a, left, right)
 
     def logpdf(self, x):
-        _lpvect = np.vectorize(self._logpdf)
-        return _lpvect(x)
+        x = np.asarray(x, dtype=float)
+        # scale factors making the PDF continuous at the central value
+        r_left = 2 * self.p_right / (self.p_left + self.p_right)
+        r_right = 2 * self.p_left / (self.p_left + self.p_right)
+        left = math.log(r_left) + normal_logpdf(x, self.central_value, self.left_deviation)
+        right = math.log(r_right) + normal_logpdf(x, self.central_value, self.right_deviation)
+        return np.where(x < self.central_value, left, right)[()]
 
     def get_error_left(self, nsigma=1):
         """Return the lower error"""
@@ -440,18 +438,18 @@ class HalfNormalDistribution(ProbabilityDistribution):
         return 'flavio.statistics.probability.HalfNormalDistribution' + \
                '({}, {})'.format(self.central_value, self.standard_deviation)
 
-    def get_random(self, size=None):
-        return self.central_value + np.sign(self.standard_deviation) * abs(np.random.normal(0, abs(self.standard_deviation), size))
+    def get_random(self, size=None, random_state=None):
+        rng = get_random_generator(random_state)
+        return self.central_value + np.sign(self.standard_deviation) * abs(rng.normal(0, abs(self.standard_deviation), size))
 
-    def _logpdf(self, x):
-        if np.sign(self.standard_deviation) * (x - self.central_value) < 0:
-            return -np.inf
-        else:
-            return math.log(2) + normal_logpdf(x, self.central_value, abs(self.standard_deviation))
+    def ppf(self, x):
+        return self.central_value + self.standard_deviation * scipy.stats.norm.ppf((1 + np.asarray(x)) / 2)
 
     def logpdf(self, x):
-        _lpvect = np.vectorize(self._logpdf)
-        return _lpvect(x)
+        x = np.asarray(x, dtype=float)
+        y = math.log(2) + normal_logpdf(x, self.central_value, abs(self.standard_deviation))
+        outside = np.sign(self.standard_deviation) * (x - self.central_value) < 0
+        return np.where(outside, -np.inf, y)[()]
 
     def cdf(self, x):
         norm = scipy.stats.norm(loc=self.central_value,
@@ -534,8 +532,8 @@ class GammaDistribution(ProbabilityDistribution):
         return 'flavio.statistics.probability.GammaDistribution' + \
                '({}, {}, {})'.format(self.a, self.loc, self.scale)
 
-    def get_random(self, size):
-        return self.scipy_dist.rvs(size=size)
+    def get_random(self, size, random_state=None):
+        return self.scipy_dist.rvs(size=size, random_state=random_state)
 
     def cdf(self, x):
         return self.scipy_dist.cdf(x)
@@ -600,19 +598,23 @@ class GammaDistributionPositive(ProbabilityDistribution):
         return 'flavio.statistics.probability.GammaDistributionPositive' + \
                '({}, {}, {})'.format(self.a, self.loc, self.scale)
 
-    def get_random(self, size=None):
+    def get_random(self, size=None, random_state=None):
+        if random_state is not None:
+            # draw all iterations from the same stream
+            random_state = get_random_generator(random_state)
         if size is None:
-            return self._get_random()
+            return self._get_random(random_state=random_state)
         else:
             # some iteration necessary as discarding negative values
             # might lead to too small size
             r = np.array([], dtype=float)
             while len(r) < size:
-                r = np.concatenate((r, self._get_random(size=2*size)))
+                r = np.concatenate((r, self._get_random(size=2*size,
+                                                        random_state=random_state)))
             return r[:size]
 
-    def _get_random(self, size):
-        r = self.scipy_dist.rvs(size=size)
+    def _get_random(self, size=None, random_state=None):
+        r = self.scipy_dist.rvs(size=size, random_state=random_state)
         return r[(r >= 0)]
 
     def cdf(self, x):
@@ -628,6 +630,7 @@ class GammaDistributionPositive(ProbabilityDistribution):
         return self.scipy_dist.ppf((1-cdf0)*x +  cdf0)
 
     def logpdf(self, x):
+        x = np.asarray(x, dtype=float)
         # return -inf for negative x values
         inf0 = np.piecewise(np.asarray(x, dtype=float), [x<0, x>=0], [-np.inf, 0.])
         return inf0 + self.scipy_dist.logpdf(x) + np.log(self._pdf_scale)
@@ -760,17 +763,20 @@ class NumericalDistribution(ProbabilityDistribution):
         _cdf = _cdf/_cdf[-1] # normalize CDF to 1
         self.ppf_interp = interp1d(_cdf, x)
         self.cdf_interp = interp1d(x, _cdf)
+        # inverse CDF table for get_random
+        self._cdf_table = (_cdf, np.asarray(x, dtype=float))
 
     def __repr__(self):
         return 'flavio.statistics.probability.NumericalDistribution' + \
                '({}, {})'.format(self.x, self.y)
 
-    def get_random(self, size=None):
+    def get_random(self, size=None, random_state=None):
         """Draw a random number from the distribution.
 
-        If size is not None but an integer N, return an array of N numbers."""
-        r = np.random.uniform(size=size)
-        return self.ppf_interp(r)
+        If size is not None but an integer N, return an array of N numbers.
+        `random_state` is passed to `get_random_generator`."""
+        r = get_random_generator(random_state).uniform(size=size)
+        return np.interp(r, *self._cdf_table)
 
     def ppf(self, x):
         return self.ppf_interp(x)
@@ -854,13 +860,57 @@ class NumericalDistribution(ProbabilityDistribution):
         else:
             raise ValueError("Method " + str(method) + " unknown")
 
+    # maximum number of discretized distributions kept in the cache
+    _from_pd_cache_size = 256
+
     @classmethod
     def from_pd(cls, pd, nsteps=1000):
+        """Return a numerical approximation of the distribution `pd`.
+
+        The discretized PDFs are cached by the class and arguments of `pd`, so
+        converting the same distribution repeatedly (e.g. when loading
+        measurements) is cheap. A new instance is returned on every call,
+        since constraints on different parameters must not share the same
+        distribution object."""
         if isinstance(pd, NumericalDistribution):
             return pd
-        _x = np.linspace(pd.support[0], pd.support[-1], nsteps)
-        _y = np.exp(pd.logpdf(_x))
-        return cls(central_value=pd.central_value, x=_x, y=_y)
+        key = _distribution_key(pd)
+        if key is not None:
+            key = (cls, key, nsteps)
+        if key is not None and key in _from_pd_cache:
+            _from_pd_cache.move_to_end(key)
+            _x, _y = _from_pd_cache[key]
+        else:
+            _x = np.linspace(pd.support[0], pd.support[-1], nsteps)
+            _y = np.exp(pd.logpdf(_x))
+            if key is not None:
+                _from_pd_cache[key] = (_x, _y)
+                if len(_from_pd_cache) > cls._from_pd_cache_size:
+                    _from_pd_cache.popitem(last=False)
+        return cls(central_value=pd.central_value, x=_x.copy(), y=_y.copy())
+
+
+# cache of the grids of NumericalDistribution.from_pd
+_from_pd_cache = OrderedDict()
+
+
+def _distribution_key(pd):
+    """Return a hashable key identifying a distribution by its class and
+    arguments, or None if this is not possible."""
+    try:
+        items = []
+        for k, v in pd.get_dict().items():
+            if isinstance(v, np.ndarray):
+                v = (v.dtype.str, v.shape, v.tobytes())
+            elif isinstance(v, list):
+                v = repr(v)
+            items.append((k, v))
+        key = (pd.__class__, tuple(items))
+        hash(key)
+    except (KeyError, TypeError):
+        return None
+    return key
+
 
 class GeneralGammaUpperLimit(NumericalDistribution):
     r"""Distribution appropriate for
@@ -989,6 +1039,10 @@ class KernelDensityEstimate(NumericalDistribution):
     - `kernel`: instance of `ProbabilityDistribution` used as smoothing kernel
     - `n_bins` (optional): number of bins used in the intermediate step. This normally
       does not have to be changed.
+
+    The data are binned linearly onto a grid of at least 1000 points and
+    convolved with the kernel using a fast Fourier transform, so large
+    data sets are cheap.
     """
 
     def __init__(self, data, kernel, n_bins=None):
@@ -1000,12 +1054,30 @@ class KernelDensityEstimate(NumericalDistribution):
             self.n_bins = min(1000, self.n)
         else:
             self.n_bins = n_bins
-        y, x_edges = np.histogram(data, bins=self.n_bins, normed=True)
-        x = (x_edges[:-1] + x_edges[1:])/2.
-        self.y_raw = y
-        self.raw_dist = NumericalDistribution(x, y)
-        cdist = convolve_distributions([self.raw_dist, self.kernel], 'sum')
-        super().__init__(cdist.x, cdist.y)
+        nsteps = max(1000, self.n_bins)
+        x = np.linspace(np.min(data) + self.kernel.support[0],
+                        np.max(data) + self.kernel.support[-1], nsteps)
+        if x[-1] <= x[0]:
+            raise ValueError("The kernel must have a finite width if all the "
+                             "data points are equal")
+        y = binned_kde(data, x, lambda dx: np.exp(self.kernel.logpdf(dx)))
+        super().__init__(x, y)
+        self._raw_dist = None
+
+    @property
+    def raw_dist(self):
+        """Histogram of the data with `n_bins` bins as an instance of
+        `NumericalDistribution`."""
+        if self._raw_dist is None:
+            y, x_edges = np.histogram(self.data, bins=self.n_bins, density=True)
+            x = (x_edges[:-1] + x_edges[1:])/2.
+            self._raw_dist = NumericalDistribution(x, y)
+        return self._raw_dist
+
+    @property
+    def y_raw(self):
+        """Values of the histogram of the data, see `raw_dist`."""
+        return self.raw_dist.y
 
     def __repr__(self):
         return 'flavio.statistics.probability.KernelDensityEstimate' + \
@@ -1052,7 +1124,8 @@ class MultivariateNormalDistribution(ProbabilityDistribution):
 
     Methods:
 
-    - get_random(size=None): get `size` random numbers (default: a single one)
+    - get_random(size=None, random_state=None): get `size` random numbers
+      (default: a single one)
     - logpdf(x, exclude=None): get the logarithm of the probability density
       function. If an iterable of integers is given for `exclude`, the parameters
       at these positions will be removed from the covariance before evaluating
@@ -1104,48 +1177,80 @@ class MultivariateNormalDistribution(ProbabilityDistribution):
         self.scaled_covariance = self.covariance / np.outer(self.err, self.err)
         assert np.all(np.linalg.eigvals(self.scaled_covariance) >
                       0), "The covariance matrix is not positive definite!" + str(covariance)
+        # the Cholesky factor of the scaled covariance and the normalization
+        # of the PDF are precomputed for fast evaluation of the PDF
+        self._scaled_cholesky = scipy.linalg.cholesky(self.scaled_covariance,
+                                                      lower=True)
+        logdet = 2 * np.sum(np.log(np.diag(self._scaled_cholesky))) \
+                 + 2 * np.sum(np.log(self.err))
+        self._lognorm = -(len(self.err) * math.log(2 * math.pi) + logdet) / 2
+        # cache of marginal distributions for `logpdf` with `exclude`
+        self._marginals = OrderedDict()
 
     def __repr__(self):
         return 'flavio.statistics.probability.MultivariateNormalDistribution' + \
                '({}, {})'.format(self.central_value, self.covariance)
 
-    def get_random(self, size=None):
+    def get_random(self, size=None, random_state=None):
         """Get `size` random numbers (default: a single one)"""
-        return np.random.multivariate_normal(self.central_value, self.covariance, size)
+        rng = get_random_generator(random_state)
+        return rng.multivariate_normal(self.central_value, self.covariance, size)
 
     def logpdf(self, x, exclude=None):
         """Get the logarithm of the probability density function.
 
         Parameters:
 
-        - x: vector; position at which PDF should be evaluated
+        - x: vector; position at which PDF should be evaluated. Can also be an
+          array of shape (M, n) (or any shape with n as last dimension) for
+          evaluating the PDF at M points at once, in which case an array of
+          length M is returned.
         - exclude: optional; if an iterable of integers is given, the parameters
           at these positions will be removed from the covariance before
           evaluating the PDF, effectively ignoring certain dimensions.
         """
         if exclude is not None:
-            # if parameters are to be excluded, construct a temporary
-            # distribution with reduced mean vector and covariance matrix
-            # and call its logpdf method
-            _cent_ex = np.delete(self.central_value, exclude)
-            _cov_ex = np.delete(
-                np.delete(self.covariance, exclude, axis=0), exclude, axis=1)
-            if len(_cent_ex) == 1:
-                # if only 1 dimension remains, can use a univariate Gaussian
-                _dist_ex = NormalDistribution(
-                    central_value=_cent_ex[0], standard_deviation=np.sqrt(_cov_ex[0, 0]))
-                return _dist_ex.logpdf(x)
-            else:
-                # if more than 1 dimension remains, use a (smaller)
-                # multivariate Gaussian
-                _dist_ex = MultivariateNormalDistribution(
-                    central_value=_cent_ex, covariance=_cov_ex)
-                return _dist_ex.logpdf(x, exclude=None)
-        # undoing the rescaling of the covariance
-        pdf_scaled = scipy.stats.multivariate_normal.logpdf(
-            x / self.err, self.central_value / self.err, self.scaled_covariance)
-        sign, logdet = np.linalg.slogdet(self.covariance)
-        return pdf_scaled + (np.linalg.slogdet(self.scaled_covariance)[1] - np.linalg.slogdet(self.covariance)[1]) / 2.
+            # if parameters are to be excluded, use the distribution with
+            # reduced mean vector and covariance matrix
+            return self._get_marginal(exclude).logpdf(x)
+        # residuals in units of the standard deviations
+        z = (np.asarray(x) - self.central_value) / self.err
+        # the last axis of x labels the dimensions, the others the points
+        shape = z.shape[:-1]
+        z = z.reshape(-1, z.shape[-1])
+        y = scipy.linalg.solve_triangular(self._scaled_cholesky, z.T,
+                                          lower=True, check_finite=False)
+        return (self._lognorm - np.sum(y**2, axis=0) / 2).reshape(shape)[()]
+
+    # maximum number of marginal distributions kept in the cache
+    _marginal_cache_size = 32
+
+    def _get_marginal(self, exclude):
+        """Return the marginal distribution with the dimensions at the
+        positions `exclude` removed.
+
+        The distributions are cached, so repeated calls with the same
+        `exclude` are cheap."""
+        key = tuple(sorted(set(int(i) for i in np.atleast_1d(exclude))))
+        if key in self._marginals:
+            self._marginals.move_to_end(key)
+            return self._marginals[key]
+        _cent_ex = np.delete(self.central_value, key)
+        _cov_ex = np.delete(
+            np.delete(self.covariance, key, axis=0), key, axis=1)
+        if len(_cent_ex) == 1:
+            # if only 1 dimension remains, can use a univariate Gaussian
+            _dist_ex = NormalDistribution(
+                central_value=_cent_ex[0], standard_deviation=np.sqrt(_cov_ex[0, 0]))
+        else:
+            # if more than 1 dimension remains, use a (smaller)
+            # multivariate Gaussian
+            _dist_ex = MultivariateNormalDistribution(
+                central_value=_cent_ex, covariance=_cov_ex)
+        self._marginals[key] = _dist_ex
+        if len(self._marginals) > self._marginal_cache_size:
+            self._marginals.popitem(last=False)
+        return _dist_ex
 
     def get_error_left(self, nsigma=1):
         """Return the lower errors"""
@@ -1206,17 +1311,17 @@ class MultivariateNumericalDistribution(ProbabilityDistribution):
             self.logpdf_interp = RegularGridInterpolator(self.xi, logy,
                                         fill_value=-np.inf, bounds_error=False)
         # the following is needed for get_random: initialize to None
-        self._y_flat = None
         self._cdf_flat = None
 
     def __repr__(self):
         return 'flavio.statistics.probability.MultivariateNumericalDistribution' + \
                '({}, {}, {})'.format([x.tolist() for x in self.xi], self.y.tolist(), list(self.central_value))
 
-    def get_random(self, size=None):
+    def get_random(self, size=None, random_state=None):
         """Draw a random number from the distribution.
 
         If size is not None but an integer N, return an array of N numbers.
+        `random_state` is passed to `get_random_generator`.
 
         For the MultivariateNumericalDistribution, the PDF from which the
         random numbers are drawn is approximated to be piecewise constant in
@@ -1224,39 +1329,33 @@ class MultivariateNumericalDistribution(ProbabilityDistribution):
         lattice spacing will lead to a smoother distribution of random numbers
         (but will also be slower).
         """
-
-        if size is None:
-            return self._get_random()
-        else:
-            return np.array([self._get_random() for i in range(size)])
-
-    def _get_random(self):
-        # if these have not been initialized, do it (once)
-        if self._y_flat is None:
-            # get a flattened array of the PDF
-            self._y_flat = self.y.flatten()
         if self._cdf_flat is None:
-            # get the (discrete) 1D CDF
-            _cdf_flat =  np.cumsum(self._y_flat)
+            # get the (discrete) 1D CDF of the flattened grid (once)
+            _cdf_flat = np.cumsum(self.y.ravel())
             # normalize to 1
             self._cdf_flat = _cdf_flat/_cdf_flat[-1]
-        # draw a number between 0 and 1
-        r = np.random.uniform()
-        # find the index of the CDF-value closest to r
-        i_r = np.argmin(np.abs(self._cdf_flat-r))
-        indices = np.where(self.y == self._y_flat[i_r])
-        i_bla = np.random.choice(len(indices[0]))
-        index = tuple([a[i_bla] for a in indices])
-        xi_r = [ self.xi[i][index[i]] for i in range(len(self.xi)) ]
-        xi_diff = np.array([ X[1]-X[0] for X in self.xi ])
-        return xi_r + np.random.uniform(low=-0.5, high=0.5, size=len(self.xi)) * xi_diff
+        n = 1 if size is None else size
+        rng = get_random_generator(random_state)
+        # draw lattice points with probabilities proportional to the PDF
+        r = rng.uniform(size=n)
+        i_r = np.searchsorted(self._cdf_flat, r, side='right')
+        i_r = np.minimum(i_r, len(self._cdf_flat) - 1)
+        index = np.unravel_index(i_r, self.y.shape)
+        xi_r = np.array([x[i] for x, i in zip(self.xi, index)]).T
+        # smear uniformly over the hypercube around each lattice point
+        xi_diff = np.array([x[1] - x[0] for x in self.xi])
+        xi_r = xi_r + rng.uniform(low=-0.5, high=0.5, size=xi_r.shape) * xi_diff
+        if size is None:
+            return xi_r[0]
+        return xi_r
 
     def logpdf(self, x, exclude=None):
         """Get the logarithm of the probability density function.
 
         Parameters:
 
-        - x: vector; position at which PDF should be evaluated
+        - x: vector; position at which PDF should be evaluated. Can also be an
+          array of shape (M, n) for evaluating the PDF at M points at once.
         - exclude: optional; if an iterable of integers is given, the parameters
           at these positions will be ignored by maximizing the likelihood
           along the remaining directions, i.e., they will be "profiled out".
@@ -1377,6 +1476,12 @@ def _convolve_distributions_univariate(probability_distributions, central_values
     if gaussians and not others:
         # if there are only the gaussians, we are done.
         return gaussian
+    elif (gaussians and len(others) == 1
+          and isinstance(others[0], (AsymmetricNormalDistribution,
+                                     HalfNormalDistribution))):
+        # the convolution is known in closed form
+        return _convolve_gaussian_half_normals(gaussian, others[0],
+                                               central_values=central_values)
     else:
         # otherwise, we need to combine the (combined) gaussian with the others
         if gaussians:
@@ -1500,6 +1605,40 @@ def _convolve_numerical(probability_distributions, nsteps=1000, central_values='
             y = y[n_x_central:nsteps + n_x_central]
     return NumericalDistribution(central_value=central_value, x=x, y=y)
 
+def _convolve_gaussian_half_normals(gaussian, other, nsteps=1000, central_values='same'):
+    """Convolve a normal distribution with an asymmetric normal or half-normal
+    distribution.
+
+    Both are mixtures of half-normal distributions, and the convolution of a
+    half-normal with a normal distribution is a skew normal distribution,
+    so the PDF can be evaluated exactly rather than with an FFT. As for
+    `_convolve_numerical`, a `NumericalDistribution` is returned."""
+    if central_values == 'same':
+        central_value = other.central_value
+        assert gaussian.central_value == central_value, \
+            "Distrubtions must all have the same central value"
+    elif central_values == 'sum':
+        central_value = other.central_value + gaussian.central_value
+    # half-normal components as (weight, signed standard deviation)
+    if isinstance(other, AsymmetricNormalDistribution):
+        a = other.left_deviation / (other.right_deviation + other.left_deviation)
+        components = [(a, -other.left_deviation), (1 - a, other.right_deviation)]
+    else:
+        components = [(1, other.standard_deviation)]
+    # same support as the numerical convolution
+    pds = [gaussian, other]
+    support = (central_value - sum(p.central_value - p.support[0] for p in pds),
+               central_value + sum(p.support[-1] - p.central_value for p in pds))
+    x = np.linspace(support[0], support[1], nsteps)
+    s = gaussian.standard_deviation
+    y = np.zeros(nsteps)
+    for w, sigma in components:
+        # skew normal PDF with scale omega and shape parameter sigma/s
+        omega = math.sqrt(sigma**2 + s**2)
+        z = (x - central_value) / omega
+        y += w * 2 * normal_pdf(z, 0, 1) * scipy.special.ndtr(sigma / s * z) / omega
+    return NumericalDistribution(central_value=central_value, x=x, y=y)
+
 def _convolve_multivariate_gaussian_numerical(mvgaussian,
                                               mvnumerical,
                                               central_values='same'):
@@ -46,6 +46,22 @@ class TestClasses(unittest.TestCase):
         self.assertEqual(fit.get_measurements, ['measurement of test_obs'])
         self.assertEqual(fit.get_central_fit_parameters, [4.2])
         self.assertEqual(fit.get_central_nuisance_parameters, [1.2])
+        # the selected measurements are cached until measurements change
+        plans = fit._get_measurement_plans()[1]
+        self.assertIs(plans, fit._get_measurement_plans()[1])
+        m2 = Measurement( 'measurement 2 of test_obs' )
+        self.assertEqual(fit.get_measurements, ['measurement of test_obs'])
+        m2.add_constraint(['test_obs'], d)
+        self.assertEqual(set(fit.get_measurements),
+                         {'measurement of test_obs', 'measurement 2 of test_obs'})
+        fit.exclude_measurements = ['measurement 2 of test_obs']
+        self.assertEqual(fit.get_measurements, ['measurement of test_obs'])
+        # in-place changes are detected
+        fit.exclude_measurements.append('measurement of test_obs')
+        self.assertEqual(fit.get_measurements, [])
+        Measurement.del_instance('measurement 2 of test_obs')
+        fit.exclude_measurements = None
+        self.assertEqual(fit.get_measurements, ['measurement of test_obs'])
         # removing dummy instances
         Fit.del_instance('test_fit_1')
         Observable.del_instance('test_obs')
@@ -98,6 +114,14 @@ class TestClasses(unittest.TestCase):
         # ... and back
         np.testing.assert_array_equal(fit.dict_to_array(d), np.array([1.,2.,3.,4.,5.]))
         self.assertEqual(fit.get_random.shape, (5,))
+        par_dict = fit.get_par_dict(np.array([4.5,1.0,0.08,4.,5.]))
+        self.assertEqual((par_dict['m_b'], par_dict['m_c'], par_dict['m_s']), (4.5, 1.0, 0.08))
+        self.assertEqual(par_dict['m_t'], fit.parameters_central['m_t'])
+        self.assertIsInstance(fit.parameters_central, dict)
+        self.assertIsInstance(par_dict, dict)
+        self.assertIs(type(par_dict['m_b']), float)
+        par_dict = fit.get_par_dict(np.array([4.5,1.0,0.08,4.,5.]), nuisance=False)
+        self.assertEqual(par_dict['m_s'], 0.1)
         fit.log_prior_parameters(np.array([4.5,1.0,0.08,4.,5.]))
         fit.get_predictions(np.array([4.5,1.0,0.08,4.,5.]))
         fit.log_likelihood_exp(np.array([4.5,1.0,0.08,4.,5.]))
@@ -153,9 +177,53 @@ class TestClasses(unittest.TestCase):
         fit = fit2  # the following is only for fit2
         cov_weighted = [[0.008, 0.012],[0.012,0.0855]]
         mean_weighted = [5.8, 1.7]
+        # normal measurements are combined analytically
+        central_exp, cov_exp = fit.get_exp_central_covariance(force=False)
+        npt.assert_array_almost_equal(central_exp, mean_weighted, decimal=4)
+        npt.assert_array_almost_equal(cov_exp, cov_weighted, decimal=4)
         exact_log_likelihood = scipy.stats.multivariate_normal.logpdf([5.9, 2.5], mean_weighted, cov_weighted)
         self.assertAlmostEqual(fit.log_likelihood([5.9]), exact_log_likelihood, delta=0.8)
         self.assertAlmostEqual(fit.best_fit()['x'], 5.9, delta=0.1)
+        # many points at once
+        X = [[5.7], [5.9], [6.1]]
+        ll = fit.log_likelihood_batch(X)
+        self.assertEqual(ll.shape, (3,))
+        for i, x in enumerate(X):
+            self.assertAlmostEqual(ll[i], fit.log_likelihood(x), places=8)
+        npt.assert_array_almost_equal(fit.log_likelihood_batch(X, threads=2), ll)
+        # vectorized predictions are called once for all points
+        calls = []
+        def f1_vectorized(wc_obj, par_dict):
+            calls.append(1)
+            return par_dict['m_b']
+        Prediction( 'test_obs 1', f1_vectorized, vectorized=True )
+        npt.assert_array_almost_equal(fit.log_likelihood_batch(X + [[5.9]]),
+                                      list(ll) + [ll[1]])
+        self.assertEqual(len(calls), 1)
+        Prediction( 'test_obs 1', f1 )
+        npt.assert_array_almost_equal(fit1.log_likelihood_batch(X),
+                                      [fit1.log_likelihood(x) for x in X])
+        # surrogate likelihood
+        surrogate = fit.make_surrogate(scale=2, random_state=1)
+        self.assertIs(fit.surrogate, surrogate)
+        self.assertTrue(np.all(surrogate.contains(X)))
+        npt.assert_array_almost_equal(fit.log_likelihood_batch(X), ll, decimal=6)
+        self.assertAlmostEqual(fit.log_likelihood([5.9]), ll[1], places=6)
+        # outside of the region of the approximation, the exact predictions are used
+        self.assertFalse(surrogate.contains([8.]))
+        self.assertEqual(fit.log_likelihood([8.]),
+                         fit.log_likelihood_batch([[8.]])[0])
+        fit.surrogate = None
+        exact = fit.log_likelihood([8.])
+        fit.surrogate = surrogate
+        self.assertAlmostEqual(fit.log_likelihood([8.]), exact, places=8)
+        # the approximation is discarded when the parameters change
+        fit.par_obj.add_constraint(['m_c'], fit.par_obj._parameters['m_c'][1])
+        fit.log_likelihood([5.9])
+        self.assertIsNone(fit.surrogate)
+        fit.make_surrogate(scale=2, random_state=1)
+        fit.make_measurement()
+        self.assertIsNone(fit.surrogate)
         # removing dummy instances
         FastFit.del_instance('fastfit_test_1')
         FastFit.del_instance('fastfit_test_2')
@@ -191,6 +259,12 @@ class TestClasses(unittest.TestCase):
         fit.fit_wc_names = tuple(inspect.signature(fit.fit_wc_function).parameters.keys())
         fit.make_measurement(threads=2) # multi thread calculation
         FastFit.del_instance('fastfit_test_1')
+        # linear error propagation
+        fit = FastFit('fastfit_test_1', flavio.default_parameters, [], ['m_b'], ['test_obs 1'])
+        err_b = flavio.default_parameters.get_1d_errors_rightleft()['m_b']
+        self.assertAlmostEqual(fit.get_sm_covariance(method='linear') / (sum(err_b) / 2)**2, 1)
+        fit.make_measurement(method='quadratic')
+        FastFit.del_instance('fastfit_test_1')
         Observable.del_instance('test_obs 1')
         Measurement.del_instance('measurement 1 of test_obs 1')
 
@@ -1,6 +1,7 @@
 import unittest
 import numpy as np
 import flavio
+import scipy.stats
 from flavio.statistics.functions import *
 
 class TestFunctions(unittest.TestCase):
@@ -21,3 +22,87 @@ class TestFunctions(unittest.TestCase):
         self.assertAlmostEqual(confidence_level(1), 0.6826894921370859, places=10)
         self.assertAlmostEqual(confidence_level(2), 0.9544997361036416, places=10)
         self.assertAlmostEqual(confidence_level(5), 0.9999994266968562, places=10)
+
+    def test_running_covariance(self):
+        x = np.random.rand(50, 3)
+        rc = RunningCovariance(3)
+        for chunk in np.array_split(x, 7):
+            rc.update(chunk)
+        self.assertEqual(rc.N, 50)
+        np.testing.assert_array_almost_equal(rc.mean, np.mean(x, axis=0), decimal=12)
+        np.testing.assert_array_almost_equal(rc.covariance, np.cov(x.T), decimal=12)
+        # fourth moments: uniform distribution has mu_4 / sigma^4 = 9 / 5
+        x = np.random.rand(20000, 2)
+        rc = RunningCovariance(2)
+        for chunk in np.array_split(x, 9):
+            rc.update(chunk)
+        dx = x - np.mean(x, axis=0)
+        np.testing.assert_array_almost_equal(rc._m4, np.sum(dx**4, axis=0), decimal=8)
+        np.testing.assert_array_almost_equal(rc.std_relative_error,
+                                             np.sqrt(0.8 / 20000) / 2, decimal=4)
+        # no spread
+        rc = RunningCovariance(1)
+        rc.update(np.ones((10, 1)))
+        self.assertEqual(rc.std_relative_error[0], 0)
+
+    def test_finite_difference_covariance(self):
+        cov = np.array([[1, 0.5, 0], [0.5, 2, 0], [0, 0, 0]])
+        x0 = np.array([1, 2, 3])
+        points = finite_difference_points(x0, cov)
+        # the parameter without uncertainty is not varied
+        self.assertEqual(points.shape, (5, 3))
+        np.testing.assert_array_equal(points[:, 2], 3)
+        # linear function: exact
+        A = np.array([[1, 2, 3], [0, 1, -1]])
+        pred = points @ A.T
+        np.testing.assert_array_almost_equal(
+            finite_difference_covariance(pred), A @ cov @ A.T, decimal=12)
+        # quadratic function: Var(x^2) = 4 mu^2 sigma^2 + 2 sigma^4
+        points = finite_difference_points([2], [[0.25]])
+        pred = points**2
+        self.assertAlmostEqual(finite_difference_covariance(pred)[0, 0], 4)
+        self.assertAlmostEqual(finite_difference_covariance(pred, order=2)[0, 0],
+                               4 + 2 * 0.25**2)
+
+    def test_linear_binning(self):
+        grid = np.linspace(0, 1, 5)
+        w = linear_binning([0.1, 0.5, 2], grid)
+        np.testing.assert_array_almost_equal(w, [0.6, 0.4, 1, 0, 1])
+        grid2 = [np.linspace(0, 1, 3), np.linspace(0, 2, 3)]
+        w = linear_binning([[0.25, 1.5], [0, 0]], grid2)
+        self.assertEqual(w.shape, (3, 3))
+        self.assertAlmostEqual(w.sum(), 2)
+        np.testing.assert_array_almost_equal(w[:2, 1:], [[0.25, 0.25], [0.25, 0.25]])
+        self.assertAlmostEqual(w[0, 0], 1)
+        with self.assertRaises(ValueError):
+            linear_binning([1, 1], np.linspace(1, 1, 5))
+
+    def test_binned_kde(self):
+        np.random.seed(42)
+        data = np.random.normal(1, 2, size=10000)
+        x = np.linspace(-10, 12, 500)
+        f = binned_kde(data, x, lambda dx: scipy.stats.norm.pdf(dx, scale=0.3))
+        np.testing.assert_array_almost_equal(f, scipy.stats.norm.pdf(x, 1, np.hypot(2, 0.3)),
+                                             decimal=2)
+        data = np.random.normal(size=(10000, 2))
+        grid = [np.linspace(-5, 5, 50), np.linspace(-6, 6, 60)]
+        kernel = scipy.stats.multivariate_normal(cov=0.1 * np.eye(2)).pdf
+        f = binned_kde(data, grid, kernel)
+        self.assertEqual(f.shape, (50, 60))
+        self.assertAlmostEqual(f.sum() * (10 / 49) * (12 / 59), 1, delta=0.01)
+
+    def test_quadratic_surrogate(self):
+        np.random.seed(1)
+        X = np.random.uniform(-1, 1, size=(40, 2))
+        def f(X):
+            return np.array([1 + X[:, 0] - 2 * X[:, 0] * X[:, 1],
+                             (1 + X[:, 0] + X[:, 1]**2) / (1 + 0.5 * X[:, 0])]).T
+        Y = f(X)
+        X_test = np.random.uniform(-1, 1, size=(5, 2))
+        s = QuadraticSurrogate.fit(X, Y, [0, 0], 1)
+        np.testing.assert_array_almost_equal(s.predict(X_test)[:, 0], f(X_test)[:, 0])
+        self.assertGreater(np.max(np.abs(s.predict(X_test)[:, 1] - f(X_test)[:, 1])), 1e-3)
+        s = QuadraticSurrogate.fit(X, Y, [0, 0], 1, rational=[False, True])
+        np.testing.assert_array_almost_equal(s.predict(X_test), f(X_test))
+        np.testing.assert_array_almost_equal(s.predict(X_test[0]), f(X_test)[0])
+        self.assertEqual(QuadraticSurrogate.monomials(X).shape, (40, 6))
@@ -20,6 +20,12 @@ class TestProbability(unittest.TestCase):
         ana_lpdf = log(1/sqrt(4*pi**2*np.linalg.det(cov))*exp(-np.dot(np.dot(x-c,np.linalg.inv(cov)),x-c)/2))
         self.assertAlmostEqual(num_lpdf, ana_lpdf, delta=1e-6)
         self.assertEqual(len(pdf.get_random(10)), 10)
+        # several points at once
+        x = pdf.get_random(5)
+        npt.assert_array_almost_equal(pdf.logpdf(x),
+            scipy.stats.multivariate_normal.logpdf(x, c, cov), decimal=8)
+        npt.assert_array_almost_equal(pdf.logpdf(x),
+            [pdf.logpdf(xi) for xi in x], decimal=12)
 
     def test_normal(self):
         d = NormalDistribution(2, 0.3)
@@ -155,6 +161,10 @@ class TestProbability(unittest.TestCase):
         self.assertAlmostEqual(p_num.ppf_interp(0.1), scipy.stats.norm.ppf(0.1, loc=1), delta=0.02)
         self.assertAlmostEqual(p_num.ppf_interp(0.95), scipy.stats.norm.ppf(0.95, loc=1), delta=0.02)
         self.assertEqual(len(p_num.get_random(10)), 10)
+        np.random.seed(7)
+        r = p_num.get_random(10000)
+        self.assertAlmostEqual(np.mean(r), 1, delta=0.05)
+        self.assertAlmostEqual(np.std(r), 1, delta=0.05)
 
     def test_multiv_numerical(self):
         x0 = np.arange(-5,5,0.01)
@@ -179,6 +189,12 @@ class TestProbability(unittest.TestCase):
         with self.assertRaises(NotImplementedError):
             p_num.error_right
         self.assertEqual(len(p_num.get_random(10)), 10)
+        self.assertEqual(p_num.get_random().shape, (2,))
+        np.random.seed(7)
+        r = p_num.get_random(10000)
+        self.assertEqual(r.shape, (10000, 2))
+        npt.assert_array_almost_equal(np.mean(r, axis=0), [0, 1], decimal=2)
+        npt.assert_array_almost_equal(np.cov(r.T), cov, decimal=2)
 
     def test_numerical_from_analytic(self):
         p_norm = NormalDistribution(1.64, 0.32)
@@ -389,6 +405,11 @@ class TestProbability(unittest.TestCase):
         with self.assertRaises(ValueError):
             # dimensions don't match
             self.assertEqual(pdf2.logpdf([1.1e-3, 2.4]), pdf3.logpdf([1.1e-3, 2.4, 0.2], exclude=2))
+        # marginal distributions are cached
+        self.assertIs(pdf3._get_marginal([2]), pdf3._get_marginal((2,)))
+        self.assertIs(pdf3._get_marginal((2, 0)), pdf3._get_marginal([0, 2]))
+        npt.assert_array_almost_equal(pdf3.logpdf([[1.1e-3, 2.4], [1e-3, 2]], exclude=2),
+                                      pdf2.logpdf([[1.1e-3, 2.4], [1e-3, 2]]))
 
     def test_gaussian_kde(self):
         # check that a random Gaussian is reproduced correctly
@@ -400,6 +421,14 @@ class TestProbability(unittest.TestCase):
         npt.assert_array_almost_equal(kde.pdf(x)/norm.pdf(x), np.ones(10), decimal=1)
         # check scott's factor
         self.assertAlmostEqual(kde.bandwidth, 0.4*23, delta=0.4*23*0.1*2)
+        # histogram of the data
+        self.assertEqual(len(kde.y_raw), 100)
+        self.assertAlmostEqual(np.trapz(kde.raw_dist.y, kde.raw_dist.x), 1, delta=0.05)
+        # degenerate data
+        kde = KernelDensityEstimate([1, 1, 1], NormalDistribution(0, 0.5))
+        self.assertAlmostEqual(kde.central_value, 1, delta=0.01)
+        with self.assertRaises(ValueError):
+            GaussianKDE([1, 1, 1])
 
     def test_vectorize(self):
         # check that all logpdf methods work on arrays as well
@@ -590,3 +619,92 @@ class TestProbability(unittest.TestCase):
             npt.assert_array_equal(p.correlation, np.array([[1, 0.75], [0.75, 1]]))
         with self.assertRaises(ValueError):
             MultivariateNormalDistribution([0, 0], correlation=[[1, 0.75], [0.75, 1]])
+
+    def test_ppf(self):
+        u = np.array([0.1, 0.3, 0.5, 0.7, 0.9])
+        npt.assert_array_almost_equal(UniformDistribution(1, 2).ppf(u), -1 + 4 * u)
+        npt.assert_array_equal(DeltaDistribution(3).ppf(u), 3)
+        p = AsymmetricNormalDistribution(1, 0.5, 0.2)
+        self.assertTrue(np.all(np.diff(p.ppf(u)) > 0))
+        # probability left of the mode is 0.2 / 0.7
+        self.assertAlmostEqual(p.ppf(0.2 / 0.7), 1)
+        self.assertAlmostEqual(p.ppf(0.1 / 0.7), 1 - 0.2 * scipy.stats.norm.ppf(0.75))
+        self.assertAlmostEqual(p.ppf(0.2 / 0.7 + 0.25 / 0.7),
+                               1 + 0.5 * scipy.stats.norm.ppf(0.75))
+        self.assertAlmostEqual(HalfNormalDistribution(1, 0.3).ppf(0.5),
+                               1 + 0.3 * scipy.stats.norm.ppf(0.75))
+        self.assertAlmostEqual(HalfNormalDistribution(1, -0.3).ppf(0.5),
+                               1 - 0.3 * scipy.stats.norm.ppf(0.75))
+
+    def test_asymmetric_normal_random(self):
+        np.random.seed(7)
+        p = AsymmetricNormalDistribution(1, 0.5, 0.2)
+        self.assertEqual(np.shape(p.get_random()), ())
+        r = p.get_random(20000)
+        self.assertEqual(r.shape, (20000,))
+        # fraction left of the mode is 0.2 / 0.7
+        self.assertAlmostEqual(np.mean(r < 1), 0.2 / 0.7, delta=0.01)
+
+    def test_logpdf_batch(self):
+        # array-valued logpdf agrees with the evaluation point by point
+        np.random.seed(17)
+        dists = [UniformDistribution(1, 0.5),
+                 DeltaDistribution(1),
+                 NormalDistribution(1, 0.5),
+                 LogNormalDistribution(-1, 1.3),
+                 AsymmetricNormalDistribution(1, 0.5, 0.2),
+                 HalfNormalDistribution(1, 0.5),
+                 HalfNormalDistribution(1, -0.5),
+                 GammaDistribution(2, 0, 0.5),
+                 GammaDistributionPositive(2, -1, 0.5),
+                 NumericalDistribution.from_pd(NormalDistribution(1, 0.5))]
+        x = np.concatenate([np.random.uniform(-1, 3, size=20), [1]])
+        for d in dists:
+            y = d.logpdf(x)
+            self.assertEqual(y.shape, x.shape, msg=repr(d))
+            npt.assert_array_equal(y, [d.logpdf(xi) for xi in x], err_msg=repr(d))
+            npt.assert_array_equal(d.logpdf(list(x)), y, err_msg=repr(d))
+            self.assertEqual(np.shape(d.logpdf(x[0])), (), msg=repr(d))
+        d = MultivariateNormalDistribution([1, 2], [[1, 0.5], [0.5, 2]])
+        x = np.random.rand(20, 2)
+        npt.assert_array_almost_equal(d.logpdf(x), [d.logpdf(xi) for xi in x])
+
+    def test_convolve_half_normals(self):
+        # closed-form convolution agrees with the numerical one
+        from flavio.statistics.probability import _convolve_numerical
+        x = np.linspace(-0.5, 2.5, 7)
+        for cv in ('same', 'sum'):
+            for p in (AsymmetricNormalDistribution(1, 0.5, 0.2),
+                      HalfNormalDistribution(1, 0.4),
+                      HalfNormalDistribution(1, -0.4)):
+                g = NormalDistribution(1, 0.3)
+                p_comb = convolve_distributions([p, g], central_values=cv)
+                self.assertIsInstance(p_comb, NumericalDistribution)
+                p_num = _convolve_numerical([NumericalDistribution.from_pd(p),
+                                             NumericalDistribution.from_pd(g)],
+                                            central_values=cv)
+                self.assertEqual(p_comb.central_value, p_num.central_value)
+                npt.assert_array_almost_equal(p_comb.pdf(x), p_num.pdf(x), decimal=2)
+                self.assertAlmostEqual(p_comb.error_left, p_num.error_left, places=2)
+                self.assertAlmostEqual(p_comb.error_right, p_num.error_right, places=2)
+
+    def test_from_pd_cache(self):
+        p = AsymmetricNormalDistribution(1, 0.5, 0.2)
+        p_num = NumericalDistribution.from_pd(p)
+        p_num_2 = NumericalDistribution.from_pd(AsymmetricNormalDistribution(1, 0.5, 0.2))
+        # the grid is reused, but the instances are distinct
+        self.assertIsNot(p_num_2, p_num)
+        npt.assert_array_equal(p_num_2.x, p_num.x)
+        npt.assert_array_equal(p_num_2.y, p_num.y)
+        p_num_3 = NumericalDistribution.from_pd(AsymmetricNormalDistribution(1, 0.5, 0.3))
+        self.assertFalse(np.array_equal(p_num_3.y, p_num.y))
+        self.assertEqual(len(NumericalDistribution.from_pd(p, nsteps=500).x), 500)
+
+    def test_from_pd_cache_independent_parameters(self):
+        # two parameters with equal priors remain independent
+        c = flavio.classes.Constraints()
+        c.add_constraint(['a'], NumericalDistribution.from_pd(NormalDistribution(0, 1)))
+        c.add_constraint(['b'], NumericalDistribution.from_pd(NormalDistribution(0, 1)))
+        self.assertEqual(len(c.get_logprobability_all({'a': 0, 'b': 1})), 2)
+        r = c.get_random_all()
+        self.assertNotEqual(r['a'], r['b'])
@@ -1,5 +1,6 @@
 import unittest
 import numpy as np
+import numpy.testing as npt
 import flavio
 from flavio.classes import *
 from flavio.statistics.probability import *
@@ -126,6 +127,26 @@ class TestClasses(unittest.TestCase):
         Observable.del_instance('test_obs')
         Parameter.del_instance('test_parameter')
 
+    def test_prediction_batch(self):
+        o = Observable( 'test_obs' )
+        p = Parameter( 'test_parameter' )
+        def f(wc_obj, par_dict):
+            return par_dict['test_parameter']*2
+        par_arrays = {'test_parameter': np.array([1., 2., 3.]), 'other': 5.}
+        # non-vectorized prediction: loop over points
+        pr = Prediction( 'test_obs', f )
+        npt.assert_array_equal(pr.get_par_batch(par_arrays, None), [2, 4, 6])
+        npt.assert_array_equal(o.prediction_par_batch(par_arrays, None), [2, 4, 6])
+        # vectorized prediction
+        pr = Prediction( 'test_obs', f, vectorized=True )
+        npt.assert_array_equal(o.prediction_par_batch(par_arrays, None), [2, 4, 6])
+        # vectorized prediction not depending on parameters
+        pr = Prediction( 'test_obs', lambda wc_obj, par_dict: 7, vectorized=True )
+        npt.assert_array_equal(o.prediction_par_batch(par_arrays, None), [7, 7, 7])
+        # removing dummy instances
+        Observable.del_instance('test_obs')
+        Parameter.del_instance('test_parameter')
+
     def test_implementation_class(self):
         a = AuxiliaryQuantity( 'test_aux' )
         p = Parameter( 'test_parameter' )
@@ -180,6 +201,72 @@ class TestClasses(unittest.TestCase):
         Parameter.del_instance('test_mb')
         Parameter.del_instance('test_mc')
 
+    def test_logprobability_plan(self):
+        c = flavio.default_parameters
+        par_dict = c.get_random_all()
+        parameters = ['m_b', 'alpha_s', 'm_c', 'Vus', 'Vcb', 'tau_Bs']
+        parameters += [p for p in c.all_parameters if p.startswith('B->K* BSZ')][:10]
+        exclude = ['m_c', 'B->K* BSZ a1_A0']
+        x = np.array([par_dict[p] for p in parameters])
+        excluded = set(par_dict) - set(parameters)
+        for exclude_parameters in ([], exclude):
+            plan = c.get_logprobability_plan(parameters, exclude_parameters)
+            self.assertIs(plan, c.get_logprobability_plan(parameters, exclude_parameters))
+            expected = c.get_logprobability_all(
+                par_dict, exclude_parameters=excluded | set(exclude_parameters))
+            actual = plan.logprobability_all(x)
+            self.assertEqual(set(actual), set(expected))
+            for constraint in expected:
+                self.assertAlmostEqual(actual[constraint], expected[constraint])
+            self.assertAlmostEqual(plan.logprobability(x), sum(expected.values()))
+        # the cache is invalidated when the constraints change
+        c2 = c.copy()
+        plan = c2.get_logprobability_plan(parameters)
+        c2.set_constraint('m_b', '4.2(1)')
+        self.assertIsNot(plan, c2.get_logprobability_plan(parameters))
+
+    def test_logprobability_all_batch(self):
+        c = flavio.default_parameters
+        np.random.seed(3)
+        par_random = c.get_random_all(size=5)
+        exclude = ['m_c', 'B->K* BSZ a1_A0']
+        for exclude_parameters in ([], exclude):
+            y = c.get_logprobability_all_batch(par_random, exclude_parameters)
+            self.assertEqual(y.shape, (5,))
+            for i in range(5):
+                par_dict = {p: v[i] for p, v in par_random.items()}
+                expected = c.get_logprobability_all(par_dict, exclude_parameters)
+                self.assertAlmostEqual(y[i], sum(expected.values()), places=6)
+
+    def test_parameter_vector(self):
+        c = flavio.default_parameters.copy()
+        par_dict = c.get_central_all()
+        pv = c.get_central_vector()
+        self.assertEqual(dict(pv), par_dict)
+        self.assertIs(pv.index, c.get_central_vector().index)
+        pv2 = pv.copy()
+        self.assertIs(pv2.index, pv.index)
+        pv2['m_b'] = 5.
+        pv2['new_parameter'] = 1.
+        self.assertEqual(pv2['m_b'], 5.)
+        self.assertEqual(pv['m_b'], par_dict['m_b'])
+        self.assertIn('new_parameter', pv2)
+        self.assertNotIn('new_parameter', pv)
+        self.assertEqual(len(pv2), len(pv) + 1)
+        with self.assertRaises(KeyError):
+            pv['new_parameter']
+        with self.assertRaises(TypeError):
+            del pv2['m_b']
+        pv.update(pv2)
+        self.assertEqual(pv['m_b'], 5.)
+        self.assertEqual(pv['new_parameter'], 1.)
+        npt.assert_array_equal(pv.values[pv.positions(['m_b', 'm_c'])],
+                               [5., par_dict['m_c']])
+        self.assertEqual(dict(ParameterVector.from_dict(par_dict)), par_dict)
+        # the index is renewed when the constraints change
+        c.set_constraint('new_parameter', '1.0(1)')
+        self.assertIn('new_parameter', c.get_central_vector().index)
+
 
     def test_pdf(self):
         # for the normal dist's, just check that no error is raised
@@ -223,6 +310,17 @@ class TestClasses(unittest.TestCase):
             Observable['test_obs_12'].prediction_central(flavio.default_parameters, None),
             -4)
         self.assertEqual(Observable['test_obs_12'].arguments, ['a1'])
+        # not vectorized unless requested
+        Prediction('test_obs_1', lambda wc_obj, par: 3 * par['m_b'], vectorized=True)
+        Prediction('test_obs_2', lambda wc_obj, par: par['m_b'], vectorized=True)
+        Observable.from_function('test_obs_12',
+                                 ['test_obs_1', 'test_obs_2'],
+                                 lambda x, y: x-y)
+        self.assertFalse(Observable['test_obs_12'].prediction.vectorized)
+        Observable.from_function('test_obs_12',
+                                 ['test_obs_1', 'test_obs_2'],
+                                 lambda x, y: x-y, vectorized=True)
+        self.assertTrue(Observable['test_obs_12'].prediction.vectorized)
         # delete dummy instances
         Observable.del_instance('test_obs_1')
         Observable.del_instance('test_obs_2')
@@ -349,3 +447,105 @@ class TestClasses(unittest.TestCase):
                               'eps_K')
         self.assertDictEqual(Observable.argument_format('eps_K', 'dict'),
                               {'name': 'eps_K'})
+
+    def test_evaluation_session(self):
+        par = flavio.default_parameters.get_central_all()
+        wc = flavio.WilsonCoefficients()
+        calls = []
+        def f():
+            calls.append(1)
+            return 42
+        # outside of a session, nothing is cached
+        self.assertEqual(flavio.classes.EvaluationSession.cached(par, wc, 'k', f), 42)
+        self.assertEqual(flavio.classes.EvaluationSession.cached(par, wc, 'k', f), 42)
+        self.assertEqual(len(calls), 2)
+        with flavio.classes.EvaluationSession(par, wc):
+            flavio.classes.EvaluationSession.cached(par, wc, 'k', f)
+            flavio.classes.EvaluationSession.cached(par, wc, 'k', f)
+            self.assertEqual(len(calls), 3)
+            # different parameter dictionary: not shared
+            flavio.classes.EvaluationSession.cached(par.copy(), wc, 'k', f)
+            self.assertEqual(len(calls), 4)
+        self.assertEqual(flavio.classes.EvaluationSession._active, [])
+        # predictions are unchanged within a session
+        obs = ['FL(B0->K*mumu)', 'AFB(B0->K*mumu)', 'P5p(B0->K*mumu)']
+        pred = [Observable[o].prediction_par(par, wc, 3) for o in obs]
+        with flavio.classes.EvaluationSession(par, wc):
+            pred_s = [Observable[o].prediction_par(par, wc, 3) for o in obs]
+        self.assertListEqual(pred, pred_s)
+
+    def test_prediction_cache(self):
+        o = Observable('cache test obs')
+        calls = []
+        def f(wc_obj, par, x):
+            calls.append(1)
+            if x > 0:
+                return par['m_b'] * x
+            return par['m_c'] * x
+        Prediction('cache test obs', f)
+        par = flavio.default_parameters.get_central_all()
+        wc = flavio.WilsonCoefficients()
+        self.assertIsNone(o.cache_info())
+        o.enable_cache(maxsize=3)
+        self.assertEqual(o.prediction_par(par, wc, 2), 2 * par['m_b'])
+        # changing a parameter the prediction does not depend on
+        par2 = par.copy()
+        par2['m_c'] = 1
+        self.assertEqual(o.prediction_par(par2, wc, 2), 2 * par['m_b'])
+        self.assertEqual(len(calls), 1)
+        # dependence is determined separately for each argument
+        self.assertEqual(o.prediction_par(par2, wc, -2), -2)
+        self.assertEqual(o.prediction_par(par, wc, -2), -2 * par['m_c'])
+        self.assertEqual(len(calls), 3)
+        par2['m_b'] = 4
+        self.assertEqual(o.prediction_par(par2, wc, 2), 8)
+        self.assertEqual(len(calls), 4)
+        info = o.cache_info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (1, 4, 3))
+        # least recently used entry has been evicted
+        o.prediction_par(par, wc, 2)
+        self.assertEqual(len(calls), 5)
+        o.disable_cache()
+        o.prediction_par(par, wc, 2)
+        self.assertEqual(len(calls), 6)
+        del Observable['cache test obs']
+
+    def test_get_random_all_sampling(self):
+        c = ParameterConstraints()
+        c.add_constraint(['test_ma'], NormalDistribution(1, 0.2))
+        c.add_constraint(['test_mb'], AsymmetricNormalDistribution(2, 0.3, 0.1))
+        c.add_constraint(['test_mc', 'test_md'],
+                         MultivariateNormalDistribution([1, 2], [[1, 0.5], [0.5, 1]]))
+        for sampling in ['sobol', 'halton', 'lhs']:
+            r = c.get_random_all(size=256, sampling=sampling)
+            self.assertEqual(r['test_mc'].shape, (256,))
+            self.assertAlmostEqual(np.mean(r['test_ma']), 1, delta=0.01)
+            self.assertAlmostEqual(np.std(r['test_ma']), 0.2, delta=0.02)
+            self.assertAlmostEqual(np.corrcoef(r['test_mc'], r['test_md'])[0, 1],
+                                   0.5, delta=0.1)
+        # continue a sequence with an engine
+        engine = c.get_qmc_engine('sobol')
+        r1 = c.get_random_all(size=4, sampling=engine)
+        r2 = c.get_random_all(size=4, sampling=engine)
+        self.assertFalse(np.any(r1['test_ma'] == r2['test_ma']))
+        with self.assertRaises(ValueError):
+            c.get_random_all(sampling='sobol')
+        with self.assertRaises(ValueError):
+            c.get_random_all(size=4, sampling='bla')
+
+    def test_get_random_all_random_state(self):
+        c = flavio.default_parameters
+        r1 = c.get_random_all(size=3, random_state=42)
+        r2 = c.get_random_all(size=3, random_state=np.random.default_rng(42))
+        self.assertEqual(set(r1), set(r2))
+        for p in r1:
+            npt.assert_array_equal(r1[p], r2[p])
+        # independent values for independent constraints
+        r = c.get_random_all(size=3, random_state=1)
+        self.assertFalse(np.array_equal(r['m_b'], r['m_c']))
+        rng = np.random.default_rng(1)
+        self.assertFalse(np.array_equal(c.get_random_all(size=3, random_state=rng)['m_b'],
+                                        c.get_random_all(size=3, random_state=rng)['m_b']))
+        r1 = c.get_random_all(size=4, sampling='sobol', random_state=7)
+        r2 = c.get_random_all(size=4, sampling='sobol', random_state=7)
+        npt.assert_array_equal(r1['m_b'], r2['m_b'])
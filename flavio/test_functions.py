@@ -1,5 +1,6 @@
 import unittest
 import flavio
+import numpy as np
 from flavio.classes import Observable, Prediction
 from flavio.functions import get_dependent_parameters_sm
 
@@ -34,3 +35,186 @@ class TestFunctions(unittest.TestCase):
         get_dependent_parameters_sm('<dBR/dq2>(B+->Kmumu)', 3, 5)
         get_dependent_parameters_sm('dBR/dq2(B+->Kmumu)', q2=3)
         get_dependent_parameters_sm('<dBR/dq2>(B+->Kmumu)', q2min=3, q2max=5)
+
+    def test_sm_error_budget(self):
+        o = Observable('test_obs budget')
+        def f(wc_obj, par_dict):
+            return par_dict['m_c'] + 2 * par_dict['Vcb']
+        Prediction('test_obs budget', f)
+        pred = flavio.sm_prediction('test_obs budget')
+        err = flavio.default_parameters.get_1d_errors_rightleft()
+        budget = flavio.sm_error_budget('test_obs budget', method='linear')
+        self.assertEqual(set(budget), {'m_c', 'Vcb'})
+        self.assertAlmostEqual(budget['m_c'], err['m_c'][0] / pred)
+        self.assertAlmostEqual(budget['Vcb'], 2 * err['Vcb'][0] / pred)
+        budget = flavio.sm_error_budget('test_obs budget', N=200)
+        self.assertAlmostEqual(budget['m_c'] / (err['m_c'][0] / pred), 1, delta=0.3)
+        budget = flavio.sm_error_budget('test_obs budget', N=200, threads=2)
+        self.assertAlmostEqual(budget['Vcb'] / (2 * err['Vcb'][0] / pred), 1, delta=0.3)
+        Observable.del_instance('test_obs budget')
+
+    def _define_test_observables(self):
+        Observable('test_obs 1')
+        Observable('test_obs 2')
+        def f1(wc_obj, par_dict):
+            return par_dict['m_c']
+        def f2(wc_obj, par_dict):
+            return par_dict['m_b']
+        Prediction('test_obs 1', f1)
+        Prediction('test_obs 2', f2, vectorized=True)
+        return flavio.default_parameters.get_1d_errors_rightleft()['m_c'][0]
+
+    def _delete_test_observables(self):
+        Observable.del_instance('test_obs 1')
+        Observable.del_instance('test_obs 2')
+
+    def test_sm_covariance(self):
+        o1 = Observable('test_obs 1')
+        o2 = Observable('test_obs 2')
+        def f1(wc_obj, par_dict):
+            return par_dict['m_c']
+        def f2(wc_obj, par_dict):
+            return par_dict['m_b']
+        Prediction('test_obs 1', f1)
+        Prediction('test_obs 2', f2, vectorized=True)
+        cov = flavio.sm_covariance(['test_obs 1', 'test_obs 2'], N=200)
+        err_mc = flavio.default_parameters.get_1d_errors_rightleft()['m_c'][0]
+        self.assertAlmostEqual(cov[0, 0] / err_mc**2, 1, delta=0.3)
+        # varying only m_c
+        cov = flavio.sm_covariance(['test_obs 1', 'test_obs 2'], N=50,
+                                   par_vary=['m_c'])
+        self.assertEqual(cov[1, 1], 0)
+        # delete dummy instances
+        Observable.del_instance('test_obs 1')
+        Observable.del_instance('test_obs 2')
+
+    def test_sm_covariance_chunked(self):
+        err_mc = self._define_test_observables()
+        cov = flavio.sm_covariance(['test_obs 1', 'test_obs 2'], N=200,
+                                   chunk_size=30, threads=2)
+        self.assertEqual(cov.shape, (2, 2))
+        self.assertAlmostEqual(cov[0, 0] / err_mc**2, 1, delta=0.3)
+        # single observable
+        self.assertEqual(flavio.sm_covariance(['test_obs 1'], N=10).shape, ())
+        self._delete_test_observables()
+
+    def test_sm_covariance_linear(self):
+        err_mc = self._define_test_observables()
+        cov = flavio.sm_covariance(['test_obs 1', 'test_obs 2'], method='linear')
+        err_b = flavio.default_parameters.get_1d_errors_rightleft()['m_b']
+        self.assertAlmostEqual(cov[0, 0] / err_mc**2, 1)
+        self.assertAlmostEqual(cov[1, 1] / (sum(err_b) / 2)**2, 1)
+        self.assertEqual(cov[0, 1], 0)
+        self.assertAlmostEqual(flavio.sm_uncertainty('test_obs 1', method='quadratic'),
+                               err_mc)
+        with self.assertRaises(ValueError):
+            flavio.sm_covariance(['test_obs 1'], method='bla')
+        self._delete_test_observables()
+
+    def test_sm_covariance_qmc(self):
+        err_mc = self._define_test_observables()
+        cov = flavio.sm_covariance(['test_obs 1', 'test_obs 2'], N=256,
+                                   chunk_size=64, sampling='sobol')
+        self.assertAlmostEqual(cov[0, 0] / err_mc**2, 1, delta=0.2)
+        unc = flavio.sm_uncertainty('test_obs 1', N=64, sampling='lhs')
+        self.assertAlmostEqual(unc / err_mc, 1, delta=0.2)
+        self._delete_test_observables()
+
+    def test_sm_uncertainty_adaptive(self):
+        err_mc = self._define_test_observables()
+        unc = flavio.sm_uncertainty('test_obs 1', N=100000, chunk_size=50,
+                                    target_rel_precision=0.05)
+        self.assertAlmostEqual(unc / err_mc, 1, delta=0.2)
+        rc = flavio.functions._mc_covariance(['test_obs 1', 'test_obs 2'],
+                                             flavio.physics.eft._wc_sm,
+                                             100000, 'all', 1, None, 50,
+                                             'random', 0.05, {})
+        self.assertLess(rc.N, 1000)
+        self.assertTrue(np.all(rc.std_relative_error <= 0.05))
+        self._delete_test_observables()
+
+    def test_sm_covariance_random_state(self):
+        self._define_test_observables()
+        # reproducible results independent of the number of threads
+        cov1 = flavio.sm_covariance(['test_obs 1', 'test_obs 2'], N=40,
+                                    chunk_size=15, random_state=3)
+        cov2 = flavio.sm_covariance(['test_obs 1', 'test_obs 2'], N=40,
+                                    chunk_size=15, threads=2, random_state=3)
+        np.testing.assert_array_equal(cov1, cov2)
+        self._delete_test_observables()
+
+    def test_sm_error_budget(self):
+        o = Observable('test_obs budget')
+        def f(wc_obj, par_dict):
+            return par_dict['m_c'] + 2 * par_dict['Vcb']
+        Prediction('test_obs budget', f)
+        pred = flavio.sm_prediction('test_obs budget')
+        err = flavio.default_parameters.get_1d_errors_rightleft()
+        budget = flavio.sm_error_budget('test_obs budget', method='linear')
+        self.assertEqual(set(budget), {'m_c', 'Vcb'})
+        self.assertAlmostEqual(budget['m_c'], err['m_c'][0] / pred)
+        self.assertAlmostEqual(budget['Vcb'], 2 * err['Vcb'][0] / pred)
+        budget = flavio.sm_error_budget('test_obs budget', N=200)
+        self.assertAlmostEqual(budget['m_c'] / (err['m_c'][0] / pred), 1, delta=0.3)
+        budget = flavio.sm_error_budget('test_obs budget', N=200, threads=2)
+        self.assertAlmostEqual(budget['Vcb'] / (2 * err['Vcb'][0] / pred), 1, delta=0.3)
+        Observable.del_instance('test_obs budget')
+
+    def test_sm_covariance(self):
+        o1 = Observable('test_obs 1')
+        o2 = Observable('test_obs 2')
+        def f1(wc_obj, par_dict):
+            return par_dict['m_c']
+        def f2(wc_obj, par_dict):
+            return par_dict['m_b']
+        Prediction('test_obs 1', f1)
+        Prediction('test_obs 2', f2, vectorized=True)
+        cov = flavio.sm_covariance(['test_obs 1', 'test_obs 2'], N=200)
+        err_mc = flavio.default_parameters.get_1d_errors_rightleft()['m_c'][0]
+        self.assertAlmostEqual(cov[0, 0] / err_mc**2, 1, delta=0.3)
+        # varying only m_c
+        cov = flavio.sm_covariance(['test_obs 1', 'test_obs 2'], N=50,
+                                   par_vary=['m_c'])
+        self.assertEqual(cov[1, 1], 0)
+        # chunked and parallel evaluation
+        cov = flavio.sm_covariance(['test_obs 1', 'test_obs 2'], N=200,
+                                   chunk_size=30, threads=2)
+        self.assertEqual(cov.shape, (2, 2))
+        self.assertAlmostEqual(cov[0, 0] / err_mc**2, 1, delta=0.3)
+        # single observable
+        self.assertEqual(flavio.sm_covariance(['test_obs 1'], N=10).shape, ())
+        # linear error propagation
+        cov = flavio.sm_covariance(['test_obs 1', 'test_obs 2'], method='linear')
+        err_b = flavio.default_parameters.get_1d_errors_rightleft()['m_b']
+        self.assertAlmostEqual(cov[0, 0] / err_mc**2, 1)
+        self.assertAlmostEqual(cov[1, 1] / (sum(err_b) / 2)**2, 1)
+        self.assertEqual(cov[0, 1], 0)
+        self.assertAlmostEqual(flavio.sm_uncertainty('test_obs 1', method='quadratic'),
+                               err_mc)
+        with self.assertRaises(ValueError):
+            flavio.sm_covariance(['test_obs 1'], method='bla')
+        # quasi-Monte Carlo
+        cov = flavio.sm_covariance(['test_obs 1', 'test_obs 2'], N=256,
+                                   chunk_size=64, sampling='sobol')
+        self.assertAlmostEqual(cov[0, 0] / err_mc**2, 1, delta=0.2)
+        unc = flavio.sm_uncertainty('test_obs 1', N=64, sampling='lhs')
+        self.assertAlmostEqual(unc / err_mc, 1, delta=0.2)
+        # adaptive number of evaluations
+        unc = flavio.sm_uncertainty('test_obs 1', N=100000, chunk_size=50,
+                                    target_rel_precision=0.05)
+        self.assertAlmostEqual(unc / err_mc, 1, delta=0.2)
+        rc = flavio.functions._mc_covariance(['test_obs 1', 'test_obs 2'],
+                                             flavio.physics.eft._wc_sm,
+                                             100000, 'all', 1, None, 50,
+                                             'random', 0.05, {})
+        self.assertLess(rc.N, 1000)
+        self.assertTrue(np.all(rc.std_relative_error <= 0.05))
+        # reproducible results independent of the number of threads
+        cov1 = flavio.sm_covariance(['test_obs 1', 'test_obs 2'], N=40,
+                                    chunk_size=15, random_state=3)
+        cov2 = flavio.sm_covariance(['test_obs 1', 'test_obs 2'], N=40,
+                                    chunk_size=15, threads=2, random_state=3)
+        np.testing.assert_array_equal(cov1, cov2)
+        # delete dummy instances
+        Observable.del_instance('test_obs 1')
+        Observable.del_instance('test_obs 2')
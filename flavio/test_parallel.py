@@ -0,0 +1,61 @@
+import unittest
+import numpy as np
+import flavio
+from flavio.classes import Observable, Prediction
+from flavio.parallel import Executor, get_executor
+
+
+def _square(x):
+    return x**2
+
+
+class TestParallel(unittest.TestCase):
+    def test_executor(self):
+        self.assertEqual(Executor(1).map(_square, [1, 2, 3]), [1, 4, 9])
+        with Executor(2) as executor:
+            self.assertEqual(executor.map(_square, [1, 2, 3]), [1, 4, 9])
+            pool = executor._pool
+            executor.map(_square, [4, 5])
+            # the workers are kept alive between calls
+            self.assertIs(executor._pool, pool)
+        self.assertIsNone(executor._pool)
+        with self.assertRaises(ValueError):
+            Executor(0)
+
+    def test_shared_executor(self):
+        self.assertIs(get_executor(2), get_executor(2))
+        self.assertEqual(get_executor(2).threads, 2)
+
+    def test_restart(self):
+        # observables defined after the workers have been started must be
+        # known to the workers
+        executor = Executor(2)
+        executor.map(_square, [1, 2])
+        Observable('test_obs')
+        Prediction('test_obs', lambda wc_obj, par: par['m_b'])
+        self.assertEqual(
+            flavio.sm_uncertainty('test_obs', executor=executor, N=10) > 0,
+            True)
+        executor.close()
+        Observable.del_instance('test_obs')
+
+    def test_restart_parameters(self):
+        executor = Executor(2)
+        executor.map(_square, [1, 2])
+        pool = executor._pool
+        executor.map(_square, [1, 2])
+        self.assertIs(executor._pool, pool)
+        par = flavio.default_parameters
+        flavio.default_parameters = par.copy()
+        try:
+            # a different parameter object restarts the workers
+            executor.map(_square, [1, 2])
+            self.assertIsNot(executor._pool, pool)
+            pool = executor._pool
+            # as does a modified constraint
+            flavio.default_parameters.set_constraint('m_b', '4.2 ± 0.1')
+            executor.map(_square, [1, 2])
+            self.assertIsNot(executor._pool, pool)
+        finally:
+            flavio.default_parameters = par
+            executor.close()